@@ -26,6 +26,10 @@ BS_TIMES = (None, 0)
 """""""""""""""""""""""""""'''
 FREQ_RANGE = np.arange(1, 40, 1)
 
+# Decimation of the TFR output in time
+# 1: keep all samples | int | 'auto': derived from the highest frequency
+TFR_DECIM = 1
+
 '''"""""""""""""""""""""""""""
  Unit conversion
 """""""""""""""""""""""""""'''
@@ -9,6 +9,8 @@ import sys
 import mne
 import pdb
 import scipy
+import scipy.fft
+import contextlib
 import numpy as np
 from pathlib import Path
 import mne.time_frequency
@@ -25,6 +27,11 @@ from neurodecode import logger
 from neurodecode.utils.preprocess.old_preprocess import preprocess
 from neurodecode.utils.preprocess.old_preprocess import rereference
 
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+
 def check_config(cfg):
     if not hasattr(cfg, 'TFR_TYPE'):
         cfg.TFR_TYPE = 'multitaper'
@@ -42,8 +49,34 @@ def check_config(cfg):
         cfg.MATLAB = False
     if not hasattr(cfg, 'EXPORT_PATH'):
         cfg.EXPORT_PATH = None
+    if not hasattr(cfg, 'TFR_DECIM'):
+        cfg.TFR_DECIM = 1
     return cfg
 
+def get_tfr_decim(decim, freqs, sfreq):
+    '''
+    Return the decimation factor applied to the TFR output.
+
+    If decim is 'auto', the output is downsampled as long as its sampling rate
+    stays above 4 times the highest frequency of interest.
+    '''
+    if decim == 'auto':
+        return max(1, int(sfreq // (4 * max(freqs))))
+    return int(decim)
+
+def fft_backend():
+    '''
+    Return a context manager routing scipy.fft calls to pyFFTW if installed.
+
+    Only the FFTs computed in the calling process benefit from it, i.e. the
+    MNE TFR functions called with n_jobs=1.
+    '''
+    if pyfftw is None:
+        return contextlib.nullcontext()
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(60)
+    return scipy.fft.set_backend(pyfftw.interfaces.scipy_fft)
+
 def butter_bandpass(lowcut, highcut, fs, order=5):
     nyq = fs / 2.0
     low = lowcut / nyq
@@ -165,6 +198,8 @@ def get_tfr(cfg, recursive=False, n_jobs=1):
             raise ValueError('Epoch length with buffer (%.3f) is larger than signal length (%.3f)' % (tmax_buffer, raw_tmax))
         epochs_all = mne.Epochs(raw, events, classes, tmin=tmin_buffer, tmax=tmax_buffer,
                                 proj=False, picks=picks, baseline=None, preload=True)
+        # single precision is enough for the TFR and halves the memory footprint
+        epochs_all._data = epochs_all._data.astype(np.float32, copy=False)
         if epochs_all.drop_log_stats() > 0:
             logger.error('\n** Bad epochs found. Dropping into a Python shell.')
             logger.error(epochs_all.drop_log)
@@ -185,6 +220,10 @@ def get_tfr(cfg, recursive=False, n_jobs=1):
         logger.info('>> Processing %s' % evname)
         freqs = cfg.FREQ_RANGE  # define frequencies of interest
         n_cycles = freqs / 2.  # different number of cycle per frequency
+        if tfr_type == 'butter':
+            decim = 1
+        else:
+            decim = get_tfr_decim(cfg.TFR_DECIM, freqs, sfreq)
         if cfg.POWER_AVERAGED:
             # grand-average TFR
             epochs = epochs_all[evname][:]
@@ -201,16 +240,17 @@ def get_tfr(cfg, recursive=False, n_jobs=1):
             elif tfr_type == 'fir':
                 raise NotImplementedError
             else:
-                power[evname] = tfr(epochs, freqs=freqs, n_cycles=n_cycles, use_fft=False,
-                    return_itc=False, decim=1, n_jobs=n_jobs)
+                with fft_backend():
+                    power[evname] = tfr(epochs, freqs=freqs, n_cycles=n_cycles, use_fft=True,
+                        return_itc=False, decim=decim, n_jobs=n_jobs)
                 power[evname] = power[evname].crop(tmin=tmin, tmax=tmax)
                 tfr_data = power[evname].data
 
             if cfg.EXPORT_MATLAB is True:
                 # export all channels to MATLAB
                 mout = '%s/%s-%s-%s.mat' % (export_dir, file_prefix, cfg.SP_FILTER, evname)
-                scipy.io.savemat(mout, {'tfr':tfr_data, 'chs':epochs.ch_names,
-                    'events':events, 'sfreq':sfreq, 'tmin':tmin, 'tmax':tmax, 'epochs':cfg.EPOCH, 'freqs':cfg.FREQ_RANGE})
+                scipy.io.savemat(mout, {'tfr':tfr_data.astype(np.float32, copy=False), 'chs':epochs.ch_names,
+                    'events':events, 'sfreq':sfreq / decim, 'tmin':tmin, 'tmax':tmax, 'epochs':cfg.EPOCH, 'freqs':cfg.FREQ_RANGE}, do_compression=True)
                 logger.info('Exported %s' % mout)
             if cfg.EXPORT_PNG is True:
                 # Inspect power for each channel
@@ -232,14 +272,15 @@ def get_tfr(cfg, recursive=False, n_jobs=1):
                 if len(epochs) == 0:
                     logger.WARNING('No %s epochs. Skipping.' % evname)
                     continue
-                power[evname] = tfr(epochs, freqs=freqs, n_cycles=n_cycles, use_fft=False,
-                    return_itc=False, decim=1, n_jobs=n_jobs)
+                with fft_backend():
+                    power[evname] = tfr(epochs, freqs=freqs, n_cycles=n_cycles, use_fft=True,
+                        return_itc=False, decim=decim, n_jobs=n_jobs)
                 power[evname] = power[evname].crop(tmin=tmin, tmax=tmax)
                 if cfg.EXPORT_MATLAB is True:
                     # export all channels to MATLAB
                     mout = '%s/%s-%s-%s-ep%02d.mat' % (export_dir, file_prefix, cfg.SP_FILTER, evname, ep + 1)
-                    scipy.io.savemat(mout, {'tfr':power[evname].data, 'chs':power[evname].ch_names,
-                        'events':events, 'sfreq':sfreq, 'tmin':tmin, 'tmax':tmax, 'epochs':cfg.EPOCH, 'freqs':cfg.FREQ_RANGE})
+                    scipy.io.savemat(mout, {'tfr':power[evname].data.astype(np.float32, copy=False), 'chs':power[evname].ch_names,
+                        'events':events, 'sfreq':sfreq / decim, 'tmin':tmin, 'tmax':tmax, 'epochs':cfg.EPOCH, 'freqs':cfg.FREQ_RANGE}, do_compression=True)
                     logger.info('Exported %s' % mout)
                 if cfg.EXPORT_PNG is True:
                     # Inspect power for each channel
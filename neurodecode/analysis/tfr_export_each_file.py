@@ -6,19 +6,32 @@ The result is the grand average of TFRs over all epochs.
 Kyuhwa Lee, 2018
 """
 
+import gc
+import os
 import sys
 import mne
 import scipy
+import scipy.fft
 import numpy as np
 from pathlib import Path
+from functools import partial, lru_cache
+from joblib import Parallel, delayed
 
 import mne.time_frequency
 
 import neurodecode.utils.io as io
 
 from neurodecode import logger
+from neurodecode.analysis.tfr_export import fft_backend, get_tfr_decim
 from neurodecode.utils.preprocess.old_preprocess import preprocess
 
+try:
+    import cupy
+except ImportError:
+    cupy = None
+
+FREQ_CHUNK = 8  # number of frequencies computed at once
+
 def check_cfg(cfg):
     if not hasattr(cfg, 'N_JOBS'):
         cfg.N_JOBS = None
@@ -34,8 +47,80 @@ def check_cfg(cfg):
         cfg.MATLAB = False
     if not hasattr(cfg, 'EVENT_START'):
         cfg.EVENT_START = None
+    if not hasattr(cfg, 'TFR_DECIM'):
+        cfg.TFR_DECIM = 1
+    if not hasattr(cfg, 'DEVICE'):
+        cfg.DEVICE = 'cpu'
+    if not hasattr(cfg, 'CACHE_RAW'):
+        cfg.CACHE_RAW = False
     return cfg
 
+@lru_cache(maxsize=4)
+def _read_raw_cached(fif_file, mtime):
+    '''
+    Keep the last loaded files in memory for interactive re-runs.
+    mtime is part of the cache key so that modified files are reloaded.
+    '''
+    return io.read_raw_fif(fif_file)
+
+def tfr_array_morlet_cuda(epoch_data, sfreq, freqs, n_cycles, decim=1, **kwargs):
+    '''
+    Compute the epochs-averaged Morlet power on the GPU using cupy.
+
+    Equivalent to mne.time_frequency.tfr_array_morlet(..., zero_mean=True,
+    use_fft=True, output='avg_power'). The other keyword arguments are
+    accepted for compatibility and ignored. cupy caches the FFT plans, which
+    are thus reused across files of identical length.
+    '''
+    if cupy is None:
+        logger.error('cupy must be installed to compute the TFR on the GPU.')
+        raise RuntimeError
+
+    n_times = epoch_data.shape[-1]
+
+    # Same wavelets and 'same' convolution mode as MNE
+    Ws = mne.time_frequency.morlet(sfreq, freqs, n_cycles=n_cycles, zero_mean=True)
+    n_fft = scipy.fft.next_fast_len(n_times + max(W.size for W in Ws) - 1)
+    x_fft = cupy.fft.fft(cupy.asarray(epoch_data, dtype=cupy.complex64), n_fft, axis=-1)
+
+    n_times_decim = len(range(0, n_times, decim))
+    power = cupy.empty((epoch_data.shape[1], len(freqs), n_times_decim), dtype=cupy.float32)
+    for k, W in enumerate(Ws):
+        W_fft = cupy.fft.fft(cupy.asarray(W, dtype=cupy.complex64), n_fft)
+        tfr = cupy.fft.ifft(x_fft * W_fft, axis=-1)
+        start = (W.size - 1) // 2
+        tfr = tfr[..., start:start + n_times:decim]
+        power[:, k] = (tfr.real ** 2 + tfr.imag ** 2).mean(axis=0)
+
+    return cupy.asnumpy(power)
+
+def _export_png(power, ch, ch_name, fout, baseline, mode, vmin, vmax):
+    '''
+    Plot the power of a single channel and save it to fout.
+    Runs in a joblib worker, hence the non-interactive backend.
+    '''
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    title = 'Channel %s' % (ch_name)
+    # mode= None | 'logratio' | 'ratio' | 'zscore' | 'mean' | 'percent'
+    fig = power.plot([ch], baseline=baseline, mode=mode, show=False,
+        colorbar=True, title=title, vmin=vmin, vmax=vmax, dB=False)
+    if isinstance(fig, list):
+        fig = fig[0]
+    fig.savefig(fout)
+    plt.close(fig)
+    logger.info('Exported %s' % fout)
+
+def _make_average_tfr(info, data, times, freqs, nave):
+    '''
+    Build an MNE AverageTFR from a (channels x freqs x times) power array.
+    '''
+    # MNE >= 1.7 builds TFR objects from arrays with AverageTFRArray
+    AverageTFR = getattr(mne.time_frequency, 'AverageTFRArray', mne.time_frequency.AverageTFR)
+    return AverageTFR(info, data, times, freqs, nave=nave)
+
 def get_tfr_each_file(cfg, tfr_type='multitaper', recursive=False, export_path=None, n_jobs=1):
     '''
     @params:
@@ -48,21 +133,38 @@ def get_tfr_each_file(cfg, tfr_type='multitaper', recursive=False, export_path=N
     cfg = check_cfg(cfg)
 
     t_buffer = cfg.T_BUFFER
+    # same defaults as tfr_multitaper() and tfr_morlet()
     if tfr_type == 'multitaper':
-        tfr = mne.time_frequency.tfr_multitaper
+        tfr = partial(mne.time_frequency.tfr_array_multitaper, zero_mean=True, time_bandwidth=4.0)
     elif tfr_type == 'morlet':
-        tfr = mne.time_frequency.tfr_morlet
+        tfr = partial(mne.time_frequency.tfr_array_morlet, zero_mean=True)
     else:
         raise ValueError('Wrong TFR type %s' % tfr_type)
 
+    if cfg.DEVICE == 'cuda':
+        if tfr_type == 'morlet':
+            tfr = tfr_array_morlet_cuda
+        else:
+            logger.warning('Only the morlet TFR can run on the GPU. Using the CPU.')
+
+    # identical for all files
+    picks_cache = {}  # channel layout -> (picks, spchannels)
+    freqs = cfg.FREQ_RANGE  # define frequencies of interest
+    n_cycles = freqs / 2.  # different number of cycle per frequency
+
     for fifdir in cfg.DATA_PATHS:
         for f in io.get_file_list(fifdir, fullpath=True, recursive=recursive):
             fext = Path(f).suffix
             if fext in ['.fif', '.bdf', '.gdf']:
-                get_tfr(f, cfg, tfr, cfg.N_JOBS)
+                get_tfr(f, cfg, tfr, cfg.N_JOBS, freqs, n_cycles, picks_cache)
 
-def get_tfr(fif_file, cfg, tfr, n_jobs=1):
-    raw, events = io.read_raw_fif(fif_file)
+def get_tfr(fif_file, cfg, tfr, n_jobs=1, freqs=None, n_cycles=None, picks_cache=None):
+    if cfg.CACHE_RAW:
+        # preprocess() works in place, keep the cached raw untouched
+        raw, events = _read_raw_cached(fif_file, os.path.getmtime(fif_file))
+        raw = raw.copy()
+    else:
+        raw, events = io.read_raw_fif(fif_file)
     p = Path(fif_file)
     fname = p.stem
     outpath = p.parent
@@ -70,9 +172,15 @@ def get_tfr(fif_file, cfg, tfr, n_jobs=1):
     export_dir = '%s/plot_%s' % (outpath, fname)
     io.make_dirs(export_dir)
 
-    # set channels of interest
-    picks = mne.pick_channels(raw.ch_names, cfg.CHANNEL_PICKS)
-    spchannels = picks = mne.pick_channels(raw.ch_names, cfg.SP_CHANNELS)
+    # set channels of interest, files usually share the same channel layout
+    layout = tuple(raw.ch_names)
+    if picks_cache is not None and layout in picks_cache:
+        picks, spchannels = picks_cache[layout]
+    else:
+        picks = mne.pick_channels(raw.ch_names, cfg.CHANNEL_PICKS)
+        spchannels = picks = mne.pick_channels(raw.ch_names, cfg.SP_CHANNELS)
+        if picks_cache is not None:
+            picks_cache[layout] = (picks, spchannels)
 
     if max(picks) > len(raw.info['ch_names']):
         msg = 'ERROR: "picks" has a channel index %d while there are only %d channels.' %\
@@ -85,39 +193,66 @@ def get_tfr(fif_file, cfg, tfr, n_jobs=1):
                   spectral_ch=picks, notch=cfg.NOTCH_FILTER, notch_ch=picks,
                   multiplier=cfg.MULTIPLIER, n_jobs=n_jobs)
 
-    # MNE TFR functions do not support Raw instances yet, so convert to Epoch
+    # MNE TFR functions do not support Raw instances, so work on arrays
+    sfreq = raw.info['sfreq']
     if cfg.EVENT_START is None:
-        raw._data[0][0] = 1
+        # the whole recording is a single epoch
         events = np.array([[0, 0, 1]])
-        classes = None
+        info = mne.pick_info(raw.info, picks)
+        times = raw.times
+        data = raw.get_data(picks=picks)[np.newaxis]
     else:
         classes = {'START':cfg.EVENT_START}
-    tmax = (raw._data.shape[1] - 1) / raw.info['sfreq']
-    epochs_all = mne.Epochs(raw, events, classes, tmin=0, tmax=tmax,
-                    picks=picks, baseline=None, preload=True)
+        tmax = (raw._data.shape[1] - 1) / sfreq
+        epochs_all = mne.Epochs(raw, events, classes, tmin=0, tmax=tmax,
+                        picks=picks, baseline=None, preload=True)
+        info = epochs_all.info
+        times = epochs_all.times
+        data = epochs_all.get_data()
+        del epochs_all
+    # single precision is enough for the TFR and halves the memory footprint
+    data = data.astype(np.float32, copy=False)
+
+    # free the continuous data before allocating the TFR
+    ch_names = raw.ch_names
+    del raw
+    gc.collect()
+
     logger.info('\n>> Processing %s' % fif_file)
-    freqs = cfg.FREQ_RANGE  # define frequencies of interest
-    n_cycles = freqs / 2.  # different number of cycle per frequency
-    power = tfr(epochs_all, freqs=freqs, n_cycles=n_cycles, use_fft=False,
-        return_itc=False, decim=1, n_jobs=n_jobs)
+    if freqs is None:
+        freqs = cfg.FREQ_RANGE  # define frequencies of interest
+    if n_cycles is None:
+        n_cycles = freqs / 2.  # different number of cycle per frequency
+    decim = get_tfr_decim(cfg.TFR_DECIM, freqs, sfreq)
+
+    # compute a few frequencies at a time to cap the memory of the TFR temporaries.
+    # The GPU path already builds its output one frequency at a time and must
+    # copy the data and compute its FFT only once, so it gets all the frequencies.
+    freqs = np.asarray(freqs)
+    n_cycles = np.broadcast_to(n_cycles, freqs.shape)
+    times = times[::decim]
+    power_data = np.empty((data.shape[1], len(freqs), len(times)), dtype=np.float32)
+    freq_chunk = len(freqs) if tfr is tfr_array_morlet_cuda else FREQ_CHUNK
+    with fft_backend():
+        for fc in range(0, len(freqs), freq_chunk):
+            fslice = slice(fc, fc + freq_chunk)
+            power_data[:, fslice] = tfr(data, sfreq, freqs[fslice], n_cycles=n_cycles[fslice],
+                use_fft=True, decim=decim, output='avg_power', n_jobs=n_jobs)
+    power = _make_average_tfr(info, power_data, times, freqs, len(data))
 
     if cfg.EXPORT_MATLAB is True:
         # export all channels to MATLAB
         mout = '%s/%s-%s.mat' % (export_dir, fname, cfg.SP_FILTER)
-        scipy.io.savemat(mout, {'tfr':power.data, 'chs':power.ch_names, 'events':events,
-            'sfreq':raw.info['sfreq'], 'freqs':cfg.FREQ_RANGE})
+        scipy.io.savemat(mout, {'tfr':power.data.astype(np.float32, copy=False), 'chs':power.ch_names, 'events':events,
+            'sfreq':sfreq / decim, 'freqs':cfg.FREQ_RANGE}, do_compression=True)
 
     if cfg.EXPORT_PNG is True:
-        # Plot power of each channel
-        for ch in np.arange(len(picks)):
-            ch_name = raw.ch_names[picks[ch]]
-            title = 'Channel %s' % (ch_name)
-            # mode= None | 'logratio' | 'ratio' | 'zscore' | 'mean' | 'percent'
-            fig = power.plot([ch], baseline=cfg.BS_TIMES, mode=cfg.BS_MODE, show=False,
-                colorbar=True, title=title, vmin=cfg.VMIN, vmax=cfg.VMAX, dB=False)
-            fout = '%s/%s-%s-%s.png' % (export_dir, fname, cfg.SP_FILTER, ch_name)
-            fig.savefig(fout)
-            logger.info('Exported %s' % fout)
+        # Plot power of each channel, the figures are independent
+        png_args = dict(baseline=cfg.BS_TIMES, mode=cfg.BS_MODE, vmin=cfg.VMIN, vmax=cfg.VMAX)
+        Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_export_png)(power, ch, ch_names[picks[ch]],
+                '%s/%s-%s-%s.png' % (export_dir, fname, cfg.SP_FILTER, ch_names[picks[ch]]), **png_args)
+            for ch in range(len(picks)))
 
     logger.info('Finished !')
 
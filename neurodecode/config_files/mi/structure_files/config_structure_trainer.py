@@ -74,12 +74,13 @@ class Advanced:
     # Feature types
     #-------------------------------------------
     params3 = dict()
-    params3.update({'FEATURES': {'PSD':dict(fmin=int, fmax=int, wlen=float, wstep=int, decim=int)}})        # The features type: only Power Spectrum Density supported
+    params3.update({'FEATURES': {'PSD':dict(fmin=int, fmax=int, wlen=float, wstep=int, decim=int, method=('multitaper', 'welch'))}})        # The features type: only Power Spectrum Density supported
     # fmin: The min frequency
     # fmax: The max frequency
     # wlen: The window length in seconds
     # wstep: The window step in absolute samples, used to simulate 
     # online decoding rate with a sliding window (32 is enough for 512 Hz, or 256 for 2KHz)    
+    # method: multitaper or welch (single Hann window, faster)
     params3.update({'EXPORT_GOOD_FEATURES': (False, True)})                                                 # Export decoder good feature to good_features.txt
     params3.update({'FEAT_TOPN': int})                                                                      # show only the top N features on terminal
 
@@ -34,7 +34,8 @@ from neurodecode import logger
 from neurodecode.utils.timer import Timer
 from neurodecode.triggers import trigger_def
 from neurodecode.utils.lsl import search_lsl
-from neurodecode.utils.preprocess.old_preprocess import preprocess
+from neurodecode.decoder.features import MultitaperPSD
+from neurodecode.utils.preprocess.old_preprocess import compile_preprocess
 from neurodecode.stream_receiver import StreamReceiver
 
 mne.set_log_level('ERROR')
@@ -76,6 +77,7 @@ class BCIDecoder(object):
                 raise ValueError
             self.cls = model['cls']
             self.psde = model['psde']
+            self._psd = MultitaperPSD(self.psde, dtype=np.float32)  # same PSD with cached tapers
             self._labels = list(self.cls.classes_)
             self._label_names = [model['classes'][k] for k in self.labels]
             self._spatial = model['spatial']
@@ -121,8 +123,16 @@ class BCIDecoder(object):
             if len(self._notch_ch) > 0:
                 self._notch_ch = [self._ch_names.index(p) for p in model['notch_ch']]
             if self._ref_ch is not None:
-                self._ref_ch['New'] = [self._ch_names.index(p) for p in model['_ref_ch']['New']]
-                self._ref_ch['Old'] = [self._ch_names.index(p) for p in model['_ref_ch']['Old']]
+                self._ref_ch['New'] = [self._ch_names.index(p) for p in model['ref_ch']['New']]
+                self._ref_ch['Old'] = [self._ch_names.index(p) for p in model['ref_ch']['Old']]
+
+            # The preprocessing parameters are fixed, compile them once for get_prob()
+            rereference = None if self._ref_ch is None else [self._ref_ch['New'], self._ref_ch['Old']]
+            self._preprocess = compile_preprocess(len(self._ch_names), sfreq=self._sfreq, spatial=self._spatial,
+                                                  spatial_ch=self._spatial_ch, spectral=self._spectral,
+                                                  spectral_ch=self._spectral_ch, notch=self._notch,
+                                                  notch_ch=self._notch_ch, multiplier=self._multiplier,
+                                                  ch_names=self._ch_names, rereference=rereference, decim=self._decim)
 
             self.label = label
 
@@ -218,20 +228,16 @@ class BCIDecoder(object):
             w = w.T  # -> channels x times
 
             # apply filters. Important: maintain the original channel order at this point.
-            # TODO: Not compatible with the new structure of preprocess.
-            w = preprocess(w, sfreq=self._sfreq, spatial=self._spatial, spatial_ch=self._spatial_ch,
-                          spectral=self._spectral, spectral_ch=self._spectral_ch, notch=self._notch,
-                          notch_ch=self._notch_ch, multiplier=self._multiplier, ch_names=self._ch_names,
-                          rereference=self._ref_ch, decim=self._decim)
+            w = self._preprocess(w)
 
             # select the same channels used for training
             w = w[self._picks]
 
             # psd = channels x freqs
-            psd = self.psde.transform(w.reshape((1, w.shape[0], w.shape[1])))
+            psd = self._psd.transform(w.reshape((1, w.shape[0], w.shape[1])))
 
             # make a feautre vector and classify
-            feats = np.concatenate(psd[0])
+            feats = psd[0].reshape(-1)  # view, same order as concatenating the channels
 
             # For adaptive classifier
             if self.label:
@@ -317,7 +323,7 @@ class BCIDecoder(object):
         bool
             True if the StreamReceiver is connected to a stream.
         """
-        return self._sr.is_connected()
+        return self._sr.is_connected
 
 
 #----------------------------------------------------------------------
@@ -904,7 +910,8 @@ def log_decoding(decoder, logfile, amp_name=None, pklfile=True, matfile=False, a
     t_start = prob_times[0]
     probs = np.vstack(probs)
     event_times = np.array(event_times)
-    event_times = event_times[np.where(event_times >= t_start)[0]] - t_start
+    # event timestamps are in increasing order
+    event_times = event_times[np.searchsorted(event_times, t_start):] - t_start
     prob_times = np.array(prob_times) - t_start
     event_values = np.array(event_values)
     data = dict(probs=probs, prob_times=prob_times, event_times=event_times, event_values=event_values, labels=labels)
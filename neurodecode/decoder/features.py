@@ -25,8 +25,11 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import os
 import mne
 import mne.io
+import scipy.fft
+import scipy.signal
 import numpy as np
 import multiprocessing as mp
+from functools import partial
 
 from .. import logger
 from ..utils.timer import Timer
@@ -34,6 +37,13 @@ from ..utils.timer import Timer
 from ..utils.io import read_raw_fif_multi, get_file_list
 from ..utils.preprocess.old_preprocess import preprocess as apply_preprocess
 
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+
+PSD_BATCH = 32  # number of windows per PSD computation when extracting the training features
+
 #----------------------------------------------------------------------
 def feature2chz(x, fqlist, ch_names):
     """
@@ -64,6 +74,124 @@ def feature2chz(x, fqlist, ch_names):
 
     return ch_names[ch], hz
 
+#----------------------------------------------------------------------
+class MultitaperPSD:
+    """
+    Multitaper PSD of fixed-length windows with precomputed tapers.
+
+    Gives the same output as psde.transform() for a non-adaptive MNE
+    PSDEstimator, but the DPSS tapers, their weights and the frequency bins
+    are computed once per window length instead of at every call, which
+    removes most of the MNE overhead when decoding online. Adaptive
+    estimators are computed with mne.time_frequency.psd_array_multitaper().
+
+    Parameters
+    ----------
+    psde : MNE PSDEstimator
+        The PSD estimator used for training the classifier
+    dtype : numpy.dtype
+        The precision of the tapered FFTs; float32 halves the memory traffic
+    """
+    #----------------------------------------------------------------------
+    def __init__(self, psde, dtype=np.float64):
+        self.psde = psde
+        self.dtype = np.dtype(dtype)
+
+        # adaptive weights depend on the data: call MNE directly, without the estimator wrapper
+        self._psd_adaptive = partial(mne.time_frequency.psd_array_multitaper, sfreq=psde.sfreq,
+            fmin=psde.fmin, fmax=psde.fmax, bandwidth=psde.bandwidth, adaptive=True,
+            low_bias=psde.low_bias, n_jobs=psde.n_jobs, normalization=psde.normalization, verbose=False)
+        self._n_times = None
+        self._buffers = {}  # input shape -> preallocated buffers
+
+    #----------------------------------------------------------------------
+    def _init_kernel(self, n_times):
+        """
+        Compute the weighted tapers and the frequency bins for n_times long windows.
+        """
+        sfreq = self.psde.sfreq
+        if isinstance(self.psde.bandwidth, str):
+            # single window, e.g. 'hann'
+            tapers = scipy.signal.get_window(self.psde.bandwidth, n_times)[np.newaxis]
+            eigvals = np.ones(1)
+        else:
+            if self.psde.bandwidth is not None:
+                half_nbw = float(self.psde.bandwidth) * n_times / (2.0 * sfreq)
+            else:
+                half_nbw = 4.0
+            tapers, eigvals = mne.time_frequency.dpss_windows(
+                n_times, half_nbw, int(2 * half_nbw), sym=False, low_bias=self.psde.low_bias)
+
+        # the taper weights are folded into the tapers: |w * fft(x * dpss)|^2 = |fft(x * w * dpss)|^2
+        self._tapers = (tapers * np.sqrt(eigvals)[:, np.newaxis]).astype(self.dtype)
+
+        freqs = np.fft.rfftfreq(n_times, 1.0 / sfreq)
+        self._freq_idx = np.flatnonzero((freqs >= self.psde.fmin) & (freqs <= self.psde.fmax))
+
+        # one-sided spectrum: DC and Nyquist bins are not doubled
+        self._scale = np.full(len(self._freq_idx), 2.0 / eigvals.sum())
+        self._scale[self._freq_idx == 0] /= 2.0
+        if n_times % 2 == 0:
+            self._scale[self._freq_idx == n_times // 2] /= 2.0
+        if self.psde.normalization == 'full':
+            self._scale /= sfreq
+
+        self._n_times = n_times
+        self._buffers = {}
+
+    #----------------------------------------------------------------------
+    def _get_buffers(self, shape):
+        """
+        Get the preallocated buffers for an input of the given shape.
+
+        Returns the demeaned data buffer, the tapered data buffer and the rfft
+        function over the last axis of the latter. The rfft is a reusable FFTW
+        plan bound to the tapered buffer if pyFFTW is installed.
+        """
+        if shape not in self._buffers:
+            x_buf = np.empty(shape, dtype=self.dtype)
+            shape_mt = shape[:-1] + self._tapers.shape
+            if pyfftw is None:
+                xw_buf = np.empty(shape_mt, dtype=self.dtype)
+                # scipy.fft keeps single precision and honours scipy.fft.set_workers()
+                rfft = lambda: scipy.fft.rfft(xw_buf, axis=-1)
+            else:
+                rfft = pyfftw.builders.rfft(pyfftw.empty_aligned(shape_mt, dtype=self.dtype),
+                    axis=-1, planner_effort='FFTW_MEASURE', threads=1, avoid_copy=True)
+                xw_buf = rfft.input_array
+            self._buffers[shape] = (x_buf, xw_buf, rfft)
+
+        return self._buffers[shape]
+
+    #----------------------------------------------------------------------
+    def transform(self, x):
+        """
+        Compute the PSD.
+
+        Parameters
+        ----------
+        x : numpy.Array
+            The data [epochs] x [channels] x [times]
+
+        Returns
+        -------
+        numpy.Array : The PSD [epochs] x [channels] x [freqs]
+        """
+        if self.psde.adaptive:
+            return self._psd_adaptive(x)[0]
+        if x.shape[-1] != self._n_times:
+            self._init_kernel(x.shape[-1])
+        x_buf, xw_buf, rfft = self._get_buffers(x.shape)
+
+        # the DC offset is removed before any downcast
+        np.subtract(x, x.mean(axis=-1, keepdims=True), out=x_buf, casting='same_kind')
+        np.multiply(x_buf[..., np.newaxis, :], self._tapers, out=xw_buf)
+        x_mt = rfft()[..., self._freq_idx]
+        psd = (x_mt.real ** 2 + x_mt.imag ** 2).sum(axis=-2)
+        psd *= self._scale
+
+        return psd
+
 #----------------------------------------------------------------------
 def compute_features(cfg):
     '''
@@ -270,7 +398,7 @@ def _slice_win(epochs_data, w_starts, w_length, psde, picks=None, title=None, pr
         title += ' (decim factor %d)' % preprocess['decim']
     logger.info(title)
 
-    X = None
+    windows = []
     for n in w_starts:
         n = int(round(n))
         if n >= epochs_data.shape[1]:
@@ -296,24 +424,22 @@ def _slice_win(epochs_data, w_starts, w_length, psde, picks=None, title=None, pr
                 n_jobs=preprocess['n_jobs'])
 
         # Keep only the channels of interest
-        window = window[picks, :]
-
-        # dimension: psde.transform( [epochs x channels x times] )
-        psd = psde.transform(window.reshape((1, window.shape[0], window.shape[1])))
-        psd = psd.reshape((psd.shape[0], psd.shape[1] * psd.shape[2]))
-
-        #if picks:
-            #psd = psd[0][picks]
-            #psd = psd.reshape((1, len(psd)))
-
-        if X is None:
-            X = psd
-        else:
-            X = np.concatenate((X, psd), axis=0)
+        windows.append(window[picks, :])
 
         if verbose == True:
             logger.info('[PID %d] processing frame %d / %d' % (os.getpid(), n, w_starts[-1]))
 
+    if len(windows) == 0:
+        return None
+
+    # dimension: [windows x channels x times], the windows share the same tapers and
+    # the PSDs are computed a batch of windows at a time
+    windows = np.stack(windows)
+    psd_kernel = MultitaperPSD(psde)
+    psd = np.concatenate([psd_kernel.transform(windows[i:i+PSD_BATCH])
+                          for i in range(0, len(windows), PSD_BATCH)])
+    X = psd.reshape((psd.shape[0], psd.shape[1] * psd.shape[2]))
+
     return X
 
 #----------------------------------------------------------------------
@@ -416,8 +542,9 @@ def _get_psd_feature(epochs_train, window, psdparam, picks=None, preprocess=None
     epochs_train : mne.Epochs object or list of mne.Epochs object.
         The epoched data
     window : [t_start, t_end]. Time window range for computing PSD.
-    psdparam: {fmin:float, fmax:float, wlen:float, wstep:int, decim:int}.
+    psdparam: {fmin:float, fmax:float, wlen:float, wstep:int, decim:int, method:str}.
               fmin, fmax in Hz, wlen in seconds, wstep in number of samples.
+              method: 'multitaper' (default) or 'welch' (single Hann window, cheaper).
     picks: Channels to compute features from.
 
     Returns
@@ -463,9 +590,17 @@ def _get_psd_feature(epochs_train, window, psdparam, picks=None, preprocess=None
     if 'decim' not in psdparam or psdparam['decim'] is None:
         psdparam['decim'] = 1
 
+    if psdparam.get('method', 'multitaper') == 'welch':
+        bandwidth = 'hann'  # a single taper
+    elif psdparam.get('method', 'multitaper') == 'multitaper':
+        bandwidth = None
+    else:
+        logger.error('Unknown PSD method %s' % psdparam['method'])
+        raise ValueError
+
     psde_sfreq = sfreq / psdparam['decim']
     psde = mne.decoding.PSDEstimator(sfreq=psde_sfreq, fmin=psdparam['fmin'], fmax=psdparam['fmax'],
-        bandwidth=None, adaptive=False, low_bias=True, n_jobs=1, normalization='length', verbose='WARNING')
+        bandwidth=bandwidth, adaptive=False, low_bias=True, n_jobs=1, normalization='length', verbose='WARNING')
 
     logger.info('PSD computation')
     if type(epochs_train) is list:
@@ -9,8 +9,8 @@ Kyuhwa Lee
 Swiss Federal Institute of Technology Lausanne (EPFL)
 """
 
-import math
 import numpy as np
+from scipy.linalg import cho_factor, cho_solve
 
 
 class rLDA:
@@ -32,7 +32,7 @@ class rLDA:
 
         Returns
         -------
-        np.ndarray (samples, )
+        np.ndarray (features, )
             The weight vector.
         b : bias scalar.
 
@@ -44,32 +44,42 @@ class rLDA:
         if type(Y) is list:
             Y = np.array(Y)
 
-        labels = np.unique(Y)
+        labels, label_idx = np.unique(Y, return_inverse=True)
         if X.ndim != 2:
             raise RuntimeError('X must be 2 dimensional.')
         if len(labels) != 2 or labels[0] == labels[1]:
             raise RuntimeError('Exactly two different labels required.')
 
-        index1 = np.where(Y == labels[0])[0]
-        index2 = np.where(Y == labels[1])[0]
-        cov = np.matrix(np.cov(X.T))
-        mu1 = np.matrix(np.mean(X[index1], axis=0).T).T
-        mu2 = np.matrix(np.mean(X[index2], axis=0).T).T
+        label_idx = label_idx.reshape(-1)
+        index1 = np.flatnonzero(label_idx == 0)
+        index2 = np.flatnonzero(label_idx == 1)
+        mu1 = np.mean(X[index1], axis=0)
+        mu2 = np.mean(X[index2], axis=0)
         mu = (mu1 + mu2) / 2
+
+        # pooled within-class covariance; A.T @ A is dispatched to BLAS syrk
+        Xc = np.concatenate((X[index1] - mu1, X[index2] - mu2))
+        cov = (Xc.T @ Xc) / (len(X) - 2)
         numFeatures = X.shape[1]
 
         if self.lambdaStar is not None and numFeatures > 1:
-            cov = (1 - self.lambdaStar) * cov + (self.lambdaStar /
-                                                 numFeatures) * np.trace(cov) * np.eye(cov.shape[0])
-
-        w = np.linalg.pinv(cov) * (mu2 - mu1)
-        b = -(w.T) * mu
-
-        for wi in w:
-            assert not math.isnan(wi)
-        assert not math.isnan(b)
-
-        self.coef_ = np.array(w)  # vector
+            # shrink towards the scaled identity in place, without building np.eye()
+            shrink = (self.lambdaStar / numFeatures) * np.trace(cov)
+            cov *= 1 - self.lambdaStar
+            cov.flat[::numFeatures + 1] += shrink
+
+        # the regularized covariance is symmetric positive definite
+        try:
+            w = cho_solve(cho_factor(cov, lower=True), mu2 - mu1)
+        except np.linalg.LinAlgError:
+            # singular covariance (e.g. no regularization)
+            w = np.linalg.pinv(cov) @ (mu2 - mu1)
+        b = -w @ mu
+
+        assert not np.isnan(w).any()
+        assert not np.isnan(b)
+
+        self.coef_ = w  # vector
         self.b = np.array(b)  # scalar
         self.classes_ = labels
 
@@ -79,22 +89,16 @@ class rLDA:
         """
         Returns the predicted class labels optionally with likelihoods.
         """
-        probs = []
-        predicted = []
-        for row in X:
-            probability = float(self.coef_.T * np.matrix(row).T + self.b.T)
-            if probability >= 0:
-                predicted.append(self.classes_[1])
-            else:
-                predicted.append(self.classes_[0])
+        w = self.coef_.reshape(-1)
+        scores = np.asarray(X).dot(w) + np.asarray(self.b).item()
+        # index the 2 labels directly with the sign of the scores
+        predicted = self.classes_[(scores >= 0).astype(np.intp)]
 
+        if proba:
             # rescale from 0 to 1, similar to scikit-learn's way
-            prob_norm = 1.0 / (np.exp(-probability / 10.0) + 1.0)
+            prob_norm = 1.0 / (np.exp(-scores / 10.0) + 1.0)
             # values are in the same order as that of self.classes_
-            probs.append([1 - prob_norm, prob_norm])
-
-        if proba:
-            return np.array(probs)
+            return np.stack([1 - prob_norm, prob_norm], axis=1)
         else:
             return predicted
 
@@ -53,8 +53,11 @@ class _Sound(ABC):
     def play(self, blocking=False):
         """
         Play the sound. This function creates and terminates an audio stream.
+        The stream requests the device's low latency setting to reduce the
+        delay between the call and the sound onset.
         """
-        sd.play(self._signal, samplerate=self._sample_rate, mapping=[1, 2])
+        sd.play(self._signal, samplerate=self._sample_rate, mapping=[1, 2],
+                latency='low')
         if blocking:
             sd.wait()
 
@@ -147,7 +150,10 @@ class _Sound(ABC):
 
     @volume.setter
     def volume(self, volume):
-        self._volume = _Sound._check_volume(volume)
+        volume = _Sound._check_volume(volume)
+        if list(volume) == list(self._volume):
+            return  # unchanged, skip regenerating the signal
+        self._volume = volume
         self._signal = np.zeros(shape=(self._time_arr.size, len(self._volume)))
         self._set_signal()
 
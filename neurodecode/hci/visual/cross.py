@@ -3,7 +3,7 @@ Created on Wed Jun 16 13:47:51 2021
 
 @author: Mathieu Scheltienne
 """
-import cv2
+import numpy as np
 
 from ._visual import _Visual
 from ... import logger
@@ -36,6 +36,9 @@ class Cross(_Visual):
         available monitors, or a 2-length of positive integer sequence.
     """
 
+    # Rendered (img, mask) of the crosses already drawn on a black background
+    _template_cache = dict()
+
     def __init__(self, length, thickness, color='white',
                  position='centered', window_name='Visual', window_size=None):
         super().__init__(window_name, window_size)
@@ -47,7 +50,13 @@ class Cross(_Visual):
         self._position = Cross._check_position(
             position, self._length, self._window_size, self._window_center)
 
-        self._draw_cross()
+        key = (self._window_size, self._length, self._thickness,
+               tuple(np.ravel(self._color).tolist()), self._position)
+        if key not in Cross._template_cache:
+            self._draw_cross()
+            Cross._template_cache[key] = (self.img.copy(), self._mask)
+        template, self._mask = Cross._template_cache[key]
+        self.img = template.copy()
 
     def _draw_cross(self):
         """
@@ -78,19 +87,24 @@ class Cross(_Visual):
             The color used to fill the rectangles. Either a matplotlib color
             string or a (Blue, Green, Red) tuple of int8 set between 0 and 255.
         """
+        # cv2 convention: P2 is included in the rectangle.
+        self._mask = np.zeros(self.img.shape[:2], dtype=bool)
+
         # Horizontal rectangle
         xP1 = self._position[0] - self._length//2
         yP1 = self._position[1] - self._thickness//2
         xP2 = xP1 + self._length
         yP2 = yP1 + self._thickness
-        cv2.rectangle(self.img, (xP1, yP1), (xP2, yP2), self._color, -1)
+        self._mask[yP1:yP2+1, xP1:xP2+1] = True
+        self.img[yP1:yP2+1, xP1:xP2+1] = self._color
 
         # Vertical rectangle
         xP1 = self._position[0] - self._thickness//2
         yP1 = self._position[1] - self._length//2
         xP2 = xP1 + self._thickness
         yP2 = yP1 + self._length
-        cv2.rectangle(self.img, (xP1, yP1), (xP2, yP2), self._color, -1)
+        self._mask[yP1:yP2+1, xP1:xP2+1] = True
+        self.img[yP1:yP2+1, xP1:xP2+1] = self._color
 
     # --------------------------------------------------------------------
     @staticmethod
@@ -232,7 +246,7 @@ class Cross(_Visual):
     @color.setter
     def color(self, color):
         self._color = _Visual._check_color(color)
-        self._draw_cross()
+        self.img[self._mask] = self._color
 
     @property
     def position(self):
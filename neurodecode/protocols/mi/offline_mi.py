@@ -20,6 +20,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 import sys
+import time
 import cv2
 import random
 import multiprocessing as mp
@@ -83,7 +84,7 @@ def run(cfg, state=mp.Value('i', 1), queue=None):
 
     # Wait the recording to start (GUI)
     while state.value == 2: # 0: stop, 1:start, 2:wait
-        pass
+        time.sleep(0.01)  # do not spin a core while waiting for the GUI
     #  Protocol start if equals to 1
     if not state.value:
         sys.exit()
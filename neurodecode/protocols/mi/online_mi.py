@@ -133,7 +133,6 @@ def run(cfg, state=mp.Value('i', 1), queue=None):
             The accuracy
         """
         import numpy as np
-        from sklearn.metrics import confusion_matrix as sk_confusion_matrix
 
         # find labels
         if type(Y_true) == np.ndarray:
@@ -154,16 +153,17 @@ def run(cfg, state=mp.Value('i', 1), queue=None):
         elif len(Y_pred) < len(Y_true):
             Y_true = Y_true[:len(Y_pred)]
 
-        cm = sk_confusion_matrix(Y_true, Y_pred, Y_labels)
-
-        # compute confusion matrix
-        cm_rate = cm.copy().astype('float')
-        cm_sum = np.sum(cm, axis=1)
+        # compute confusion matrix, pairs with an unknown label are ignored
+        n_labels = len(Y_labels)
+        label_to_idx = {l:i for i, l in enumerate(Y_labels)}
+        pairs = [(label_to_idx[t], label_to_idx[p]) for t, p in zip(Y_true, Y_pred)
+                 if t in label_to_idx and p in label_to_idx]
+        pairs = np.array(pairs, dtype=np.intp).reshape(-1, 2)
+        cm = np.bincount(pairs[:, 0] * n_labels + pairs[:, 1],
+                         minlength=n_labels * n_labels).reshape(n_labels, n_labels)
+        cm_rate = cm / np.maximum(cm.sum(axis=1, keepdims=True), 1)
 
         # Fill confusion string
-        for r, s in zip(cm_rate, cm_sum):
-            if s > 0:
-                r /= s
         cm_txt = label_tpl % 'gt\dt'
         for l in Y_labels:
             cm_txt += label_tpl % str(l)[:label_len]
@@ -191,7 +191,7 @@ def run(cfg, state=mp.Value('i', 1), queue=None):
 
     # Wait the recording to start (GUI)
     while state.value == 2: # 0: stop, 1:start, 2:wait
-        pass
+        time.sleep(0.01)  # do not spin a core while waiting for the GUI
 
     #  Protocol runs if state equals to 1
     if not state.value:
@@ -93,7 +93,7 @@ def check_config(cfg):
                   },
 
         # Internal parmameters for the FEATURE
-        'PSD': { 'fmin': 1, 'fmax': 40, 'wlen': 0.5, 'wstep': 16, 'decim': 1 },
+        'PSD': { 'fmin': 1, 'fmax': 40, 'wlen': 0.5, 'wstep': 16, 'decim': 1, 'method': 'multitaper' },
 
         # Internal parameters of CLASSIFIER
         'RF': { 'trees': 1000, 'depth': 5, 'seed': 666 },
@@ -1,4 +1,5 @@
 import sys
+import time
 import multiprocessing as mp
 
 from neurodecode import logger
@@ -80,7 +81,7 @@ def run(cfg, state=mp.Value('i', 1), queue=None, logger=logger):
 
     # Wait the recording to start (GUI)
     while state.value == 2: # 0: stop, 1:start, 2:wait
-        pass
+        time.sleep(0.01)  # do not spin a core while waiting for the GUI
 
     # Protocol start if equals to 1
     if not state.value:
@@ -1,4 +1,5 @@
 import sys
+import time
 import multiprocessing as mp
 
 import neurodecode.utils.io as io
@@ -65,7 +66,7 @@ def run(cfg, state=mp.Value('i', 1), queue=None):
 
     # Wait the recording to start (GUI)
     while state.value == 2: # 0: stop, 1:start, 2:wait
-        pass
+        time.sleep(0.01)  # do not spin a core while waiting for the GUI
 
     #  Protocol runs if state equals to 1
     if not state.value:
@@ -1,4 +1,7 @@
+import os
 import time
+import logging
+import threading
 import multiprocessing as mp
 
 import pylsl
@@ -12,7 +15,8 @@ from ..utils.preprocess.events import find_event_channel
 
 class StreamPlayer:
     """
-    Class for playing a recorded file on LSL network in another process.
+    Class for playing a recorded file on LSL network in another thread or
+    process.
 
     Parameters
     ----------
@@ -25,14 +29,19 @@ class StreamPlayer:
     trigger_file : str
         The absolute path to the file containing the table converting event
         numbers into event strings.
+    use_process : bool
+        If True, stream from a new process instead of a thread. pylsl releases
+        the GIL while pushing, so a thread is enough unless the calling
+        process keeps the GIL busy.
 
     Notes
     -----
-    It instances a Streamer in a new process and call Streamer.stream().
+    It instances a Streamer in a new thread (or process) and call
+    Streamer.stream().
     """
 
     def __init__(self, stream_name, fif_file, chunk_size,
-                 trigger_file=None, logger=logger):
+                 trigger_file=None, logger=logger, use_process=False):
 
         self._stream_name = stream_name
         self._fif_file = fif_file
@@ -40,13 +49,16 @@ class StreamPlayer:
         self._trigger_file = trigger_file
 
         self._logger = logger
+        self._use_process = use_process
         self._process = None
-        self._state = mp.Value('i', 0)
+        self._thread = None
+        self._state = None
+        self._stop_event = None
 
     def start(self, repeat=np.float('inf'), high_resolution=False):
         """
-        Start streaming data on LSL network in a new process by calling
-        stream().
+        Start streaming data on LSL network in a new thread or process by
+        calling stream().
 
         Parameters
         ----------
@@ -56,15 +68,26 @@ class StreamPlayer:
             If True, it uses perf_counter() instead of sleep() for higher time
             resolution. However, it uses more CPU.
         """
-        self._process = mp.Process(target=self._stream,
-                                   args=(repeat,
-                                         high_resolution,
-                                         self._state))
-        self._process.start()
-
-        while self._state.value == 0:
-            # time.sleep(0.1)
-            pass
+        if self._use_process:
+            self._state = mp.Event()
+            self._process = mp.Process(target=self._stream,
+                                       args=(repeat,
+                                             high_resolution,
+                                             self._state))
+            self._process.start()
+        else:
+            self._state = threading.Event()
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._stream,
+                                            args=(repeat,
+                                                  high_resolution,
+                                                  self._state,
+                                                  self._stop_event),
+                                            daemon=True)
+            self._thread.start()
+
+        # Block until the streamer signals that it is streaming.
+        self._state.wait()
 
     def wait(self, timeout=None):
         """
@@ -76,25 +99,34 @@ class StreamPlayer:
             Block until timeout is reached.
             If None, block until streaming is finished.
         """
-        self._process.join(timeout)
+        if self._use_process:
+            self._process.join(timeout)
+        else:
+            self._thread.join(timeout)
 
     def stop(self):
         """
-        Stop the streaming, by terminating the process.
+        Stop the streaming, by stopping the thread or terminating the process.
         """
         if self._process:
             self._logger.info(
                 f"Stop streaming data from: '{self.stream_name}'.")
             self._process.terminate()
+        elif self._thread:
+            self._logger.info(
+                f"Stop streaming data from: '{self.stream_name}'.")
+            self._stop_event.set()
+            self._thread.join()
 
-    def _stream(self, repeat, high_resolution, state):
+    def _stream(self, repeat, high_resolution, state, stop_event=None):
         """
-        The function called in the new process.
+        The function called in the new thread or process.
 
         Instance a Streamer and start streaming.
         """
         streamer = Streamer(self.stream_name, self.fif_file, self.chunk_size,
-                            self.trigger_file, self._logger, state)
+                            self.trigger_file, self._logger, state,
+                            stop_event)
         streamer.stream(repeat, high_resolution)
 
     @property
@@ -145,7 +177,7 @@ class StreamPlayer:
     @property
     def process(self):
         """
-        The launched process
+        The launched process, if use_process is True.
 
         Returns
         -------
@@ -153,6 +185,17 @@ class StreamPlayer:
         """
         return self._process
 
+    @property
+    def thread(self):
+        """
+        The launched thread, if use_process is False.
+
+        Returns
+        -------
+        threading.Thread
+        """
+        return self._thread
+
 
 class Streamer:
     """
@@ -169,8 +212,10 @@ class Streamer:
     trigger_file : str
         The absolute path to the file containing the table converting event
         numbers into event strings.
-    state : mp.Value
-        The mp sharing variable (used to wait that the streaming is launched).
+    state : mp.Event | threading.Event
+        The sharing event, set once the streaming is launched.
+    stop_event : threading.Event
+        If set, the streaming stops after the current chunk.
 
     Notes
     -----
@@ -179,17 +224,24 @@ class Streamer:
     """
 
     def __init__(self, stream_name, fif_file, chunk_size, trigger_file=None,
-                 logger=logger, state=mp.Value('i', 0)):
+                 logger=logger, state=None, stop_event=None):
 
         self._raw = None
+        self._tape = None
         self._events = None
+        self._sfreq = None
+        self._n_ch = None
+        self._trg_idx = None
+        self._trigger = None
+        self._timer_fd = None
         self._stream_name = stream_name
         self._chunk_size = chunk_size
 
-        self._thread = None
         self._tdef = None
         self._logger = logger
-        self._state = state
+        self._state = state if state is not None else mp.Event()
+        self._stop_event = stop_event if stop_event is not None \
+            else threading.Event()
 
         if trigger_file is not None:
             self._tdef = TriggerDef(trigger_file)
@@ -209,55 +261,76 @@ class Streamer:
             The number of times to replay the data (Default=inf).
         high_resolution : bool
             If True, it uses perf_counter() instead of sleep() for higher time
-            resolution. However, it uses much more CPU.
+            resolution. However, it uses much more CPU. Ignored when a timerfd
+            is available, which gives the same resolution without spinning.
         """
         self._logger.info('Streaming started.')
 
-        # Change sharing to 1 to let other process know that it is streaming.
-        with self._state.get_lock():
-            self._state.value = 1
+        # Let the caller know that it is streaming.
+        self._state.set()
 
         idx_chunk = 0
-        t_chunk = self.chunk_size / self.get_sample_rate()
-        finished = False
+        t_chunk = self.chunk_size / self._sfreq
 
+        self._init_timer()
+        high_resolution = high_resolution or self._timer_fd is not None
         if high_resolution:
             t_start = time.perf_counter()
         else:
             t_start = time.time()
+        # the chunks' LSL timestamps are derived from their index
+        t_start_lsl = pylsl.local_clock()
+
+        # bind the loop's attributes to locals
+        chunk_size = self.chunk_size
+        tape = self._tape
+        n_samples = tape.shape[0]
+        push = self._outlet.push_chunk
+        sleep = self._sleep
+        trigger = self._trigger
+        log_event = self._log_event
+        stopped = self._stop_event.is_set
+        debug = self._logger.isEnabledFor(logging.DEBUG)
 
         # start streaming
         played = 0
-        while played <= repeat:
-
-            idx_current = idx_chunk * self.chunk_size
-            chunk = self.raw._data[:,
-                                   idx_current:idx_current + self.chunk_size]
-            data = chunk.transpose().tolist()
+        pos = 0
+        while played <= repeat and not stopped():
 
-            if idx_current >= self.raw._data.shape[1] - self.chunk_size:
-                finished = True
+            # contiguous [samples x channels] view, pushed without conversion
+            chunk = tape[pos:pos + chunk_size]
 
-            self._sleep(high_resolution, idx_chunk, t_start, t_chunk)
+            sleep(high_resolution, idx_chunk, t_start, t_chunk)
 
-            self._outlet.push_chunk(data)
-            self._logger.debug(
-                '[%8.3fs] sent %d samples (LSL %8.3f)'
-                % (time.perf_counter(), len(data), pylsl.local_clock()))
+            push(chunk, timestamp=t_start_lsl + idx_chunk * t_chunk)
+            if debug:
+                self._logger.debug(
+                    '[%8.3fs] sent %d samples (LSL %8.3f)'
+                    % (time.perf_counter(), len(chunk), pylsl.local_clock()))
 
-            self._log_event(chunk)
+            # only the trigger samples are scanned, and only logged on events
+            if trigger is not None:
+                trg_chunk = trigger[pos:pos + chunk_size]
+                if trg_chunk.any():
+                    log_event(trg_chunk)
             idx_chunk += 1
+            pos += chunk_size
 
-            if finished:
+            if pos >= n_samples:
                 self._logger.info('Reached the end of data. Restarting.')
                 idx_chunk = 0
-                finished = False
+                pos = 0
                 if high_resolution:
                     t_start = time.perf_counter()
                 else:
                     t_start = time.time()
+                t_start_lsl = pylsl.local_clock()
                 played += 1
 
+        if self._timer_fd is not None:
+            os.close(self._timer_fd)
+            self._timer_fd = None
+
     def set_lsl_info(self, stream_name):
         """
         Set the lsl server's infos needed to create the LSL stream.
@@ -300,16 +373,29 @@ class Streamer:
         Load the data to play from a fif file.
         Multiplies all channel except trigger by 1e6 to convert to uV.
 
+        The scaled data is also stored once as a tape: transposed
+        [samples x channels] in a C-contiguous float32 array, matching the LSL
+        stream format. Streaming walks a position along it and pushes each
+        chunk as a view.
+
         Parameters
         ----------
         fif_file : str
             The absolute path to the .fif file to play.
         """
         self._raw, self._events = read_raw_fif(fif_file)
-
-        tch = self.get_trg_index()
-        idx = np.arange(self.raw._data.shape[0]) != tch
-        self.raw._data[idx, :] = self._raw.get_data()[idx, :] * 1E6
+        self._sfreq = float(self.raw.info['sfreq'])
+        self._n_ch = len(self.raw.ch_names)
+        self._trg_idx = find_event_channel(inst=self.raw)
+
+        # scale in place, restoring the (small) trigger row afterwards
+        data = self.raw._data
+        if self._trg_idx is not None:
+            self._trigger = data[self._trg_idx].copy()
+        data *= 1E6
+        if self._trg_idx is not None:
+            data[self._trg_idx] = self._trigger
+        self._tape = np.ascontiguousarray(data.T, dtype=np.float32)
 
         if self.raw is not None:
             self._logger.info(f'Successfully loaded {fif_file}')
@@ -326,7 +412,7 @@ class Streamer:
         float
             The sampling rate [Hz]
         """
-        return self.raw.info['sfreq']
+        return self._sfreq
 
     def get_nb_ch(self):
         """
@@ -337,7 +423,7 @@ class Streamer:
         int
             The number of channels.
         """
-        return len(self.raw.ch_names)
+        return self._n_ch
 
     def get_trg_index(self):
         """
@@ -348,7 +434,7 @@ class Streamer:
         int
             The trigger channel's index.
         """
-        return find_event_channel(inst=self.raw)
+        return self._trg_idx
 
     def get_info(self):
         """
@@ -367,11 +453,32 @@ class Streamer:
         self._logger.info(
             f'Trigger channel : {self.get_trg_index()}')
 
+    def _init_timer(self):
+        """
+        Create a timerfd to block until the next chunk is due (Linux, Python
+        3.13+). The timer is armed on absolute perf_counter() times, which
+        requires perf_counter() to read CLOCK_MONOTONIC.
+        """
+        self._timer_fd = None
+        if hasattr(os, 'timerfd_create') and \
+                time.get_clock_info('perf_counter').implementation == \
+                'clock_gettime(CLOCK_MONOTONIC)':
+            self._timer_fd = os.timerfd_create(time.CLOCK_MONOTONIC,
+                                               flags=os.TFD_CLOEXEC)
+
     def _sleep(self, high_resolution, idx_chunk, t_start, t_chunk):
         """
         Determine the time to sleep.
         """
-        if high_resolution:
+        if self._timer_fd is not None:
+            # blocks in the kernel with sub-ms wakeup, no CPU spent
+            t_sleep_until = t_start + idx_chunk * t_chunk
+            if t_sleep_until > time.perf_counter():
+                os.timerfd_settime(self._timer_fd,
+                                   flags=os.TFD_TIMER_ABSTIME,
+                                   initial=t_sleep_until)
+                os.read(self._timer_fd, 8)
+        elif high_resolution:
             # if a resolution over 2 KHz is needed
             t_sleep_until = t_start + idx_chunk * t_chunk
             while time.perf_counter() < t_sleep_until:
@@ -382,27 +489,22 @@ class Streamer:
             if t_wait > 0.001:
                 time.sleep(t_wait)
 
-    def _log_event(self, chunk):
+    def _log_event(self, trg_chunk):
         """
-        Look for an event on the data chunk and log it.
+        Log the events found on the trigger channel's chunk [samples].
         """
-        event_ch = self.get_trg_index()
-
-        if event_ch is not None:
-            event_values = set(chunk[event_ch]) - set([0])
-
-            if len(event_values) > 0:
-                if self._tdef is None:
-                    self._logger.info(f'Events: {event_values}')
+        event_values = np.unique(trg_chunk[trg_chunk != 0]).tolist()
+        if self._tdef is None:
+            self._logger.info(f'Events: {set(event_values)}')
+        else:
+            for event in event_values:
+                if event in self._tdef.by_value:
+                    self._logger.info(
+                        f'Events: {event} '
+                        f'({self._tdef.by_value[event]})')
                 else:
-                    for event in event_values:
-                        if event in self._tdef.by_value:
-                            self._logger.info(
-                                f'Events: {event} '
-                                f'({self._tdef.by_value[event]})')
-                        else:
-                            self._logger.info(
-                                f'Events: {event} (Undefined event {event})')
+                    self._logger.info(
+                        f'Events: {event} (Undefined event {event})')
 
     @property
     def raw(self):
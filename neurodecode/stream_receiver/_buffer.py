@@ -1,3 +1,5 @@
+import numpy as np
+
 from .. import logger
 
 
@@ -19,8 +21,14 @@ class Buffer():
         self._winsize = winsize
         self._bufsize = bufsize
 
-        self._data = []
-        self._timestamps = []
+        # The samples are stored in numpy arrays of up to twice bufsize, the
+        # live samples being [_start, _end). They are moved back to the start
+        # only once the arrays are full, so that the latest samples are always
+        # contiguous. The arrays grow on demand up to twice bufsize.
+        self._data = None
+        self._timestamps = None
+        self._start = 0
+        self._end = 0
 
     def fill(self, data, tslist):
         """
@@ -28,24 +36,53 @@ class Buffer():
 
         Parameters
         -----------
-        data : list
+        data : np.array | list
             The received data [samples x channels].
-        tslist : list
+        tslist : np.array | list
             The data's timestamps [samples].
         """
-        self._data.extend(data)
-        self._timestamps.extend(tslist)
-
-        if len(self._timestamps) > self._bufsize:
-            self._data = self._data[-self._bufsize:]
-            self._timestamps = self._timestamps[-self._bufsize:]
+        n = min(len(tslist), self._bufsize)
+        if n == 0:
+            return
+
+        data = np.asarray(data)
+        if data.dtype.kind in 'US':
+            # string markers, kept as objects to not truncate longer ones
+            data = data.astype(object)
+        data = data[-n:]
+        tslist = np.asarray(tslist, dtype=np.float64)[-n:]
+
+        if self._data is None:
+            size = min(2 * self._bufsize, max(2 * self._winsize, 2 * n))
+            self._data = np.empty((size,) + data.shape[1:], dtype=data.dtype)
+            self._timestamps = np.empty(size, dtype=np.float64)
+
+        if self._end + n > len(self._timestamps):
+            keep = min(self._end - self._start, self._bufsize - n)
+            if len(self._timestamps) < 2 * self._bufsize:
+                size = min(2 * self._bufsize,
+                           max(2 * len(self._timestamps), keep + n))
+                new_data = np.empty((size,) + self._data.shape[1:],
+                                    dtype=self._data.dtype)
+                new_timestamps = np.empty(size, dtype=np.float64)
+            else:
+                new_data, new_timestamps = self._data, self._timestamps
+            new_data[:keep] = self._data[self._end-keep:self._end]
+            new_timestamps[:keep] = self._timestamps[self._end-keep:self._end]
+            self._data, self._timestamps = new_data, new_timestamps
+            self._start, self._end = 0, keep
+
+        self._data[self._end:self._end+n] = data
+        self._timestamps[self._end:self._end+n] = tslist
+        self._end += n
+        self._start = max(self._start, self._end - self._bufsize)
 
     def reset_buffer(self):
         """
         Clear the buffer's data and timestamps.
         """
-        self._data = []
-        self._timestamps = []
+        self._start = 0
+        self._end = 0
 
     @property
     def winsize(self):
@@ -72,9 +109,11 @@ class Buffer():
     @property
     def data(self):
         """
-        Buffer's data [samples x channels].
+        Buffer's data [samples x channels], as a view.
         """
-        return self._data
+        if self._data is None:
+            return np.empty((0, 0))
+        return self._data[self._start:self._end]
 
     @data.setter
     def data(self, data):
@@ -83,9 +122,11 @@ class Buffer():
     @property
     def timestamps(self):
         """
-        Data's timestamps [samples].
+        Data's timestamps [samples], as a view.
         """
-        return self._timestamps
+        if self._timestamps is None:
+            return np.empty(0)
+        return self._timestamps[self._start:self._end]
 
     @timestamps.setter
     def timestamps(self, timestamps):
@@ -502,7 +502,5 @@ class StreamEEG(_Stream):
             data = np.concatenate((np.zeros((data.shape[0], 1)),
                                    data[:, self._lsl_eeg_channels]), axis=1)
 
-        data = data.tolist()
-
         # Fill its buffer
         self.buffer.fill(data, tslist)
@@ -1,5 +1,5 @@
 import time
-from threading import Thread
+from threading import Thread, Event
 
 import pylsl
 import numpy as np
@@ -29,7 +29,8 @@ class StreamReceiver:
     """
 
     def __init__(self, bufsize=1, winsize=1, stream_name=None, eeg_only=False):
-        self._acquisition_threads = dict()
+        self._acquisition_workers = dict()
+        self._resolver = None
         self.connect(bufsize, winsize, stream_name, eeg_only)
 
     def connect(self, bufsize=1, winsize=1, stream_name=None, eeg_only=False):
@@ -55,23 +56,39 @@ class StreamReceiver:
             If true, ignore non-EEG servers.
         """
         self._streams = dict()
+        self._window_out = dict()
         self._is_connected = False
         server_found = False
 
-        while not server_found:
+        # The resolver keeps an up-to-date list of the streams in the
+        # background, so results() returns at once instead of sweeping.
+        if self._resolver is None:
+            self._resolver = pylsl.ContinuousResolver()
 
-            if stream_name is None:
-                logger.info(
-                    "Looking for available lsl streaming servers...")
-            else:
-                logger.info(
-                    f"Looking for server(s): '{stream_name}'...")
+        if stream_name is None:
+            logger.info(
+                "Looking for available lsl streaming servers...")
+        else:
+            logger.info(
+                f"Looking for server(s): '{stream_name}'...")
+
+        # The streams answer the resolver at different times: once a server
+        # is found, keep collecting for the same 1 sec as pylsl.resolve_streams()
+        # so that all the streams of a setup (e.g. EEG + Markers) are connected.
+        checked = set()
+        t_found = None
+        while t_found is None or time.perf_counter() - t_found < 1:
 
-            streamInfos = pylsl.resolve_streams()
+            streamInfos = self._resolver.results()
 
             if len(streamInfos) > 0:
                 for streamInfo in streamInfos:
 
+                    # a stream already skipped stays skipped
+                    if streamInfo.uid() in checked:
+                        continue
+                    checked.add(streamInfo.uid())
+
                     # EEG streaming server only?
                     if eeg_only and streamInfo.type().lower() != 'eeg':
                         logger.info(f'Stream {streamInfo.name()} skipped.')
@@ -102,11 +119,17 @@ class StreamReceiver:
                             streamInfo, bufsize, winsize)
 
                     server_found = True
-            time.sleep(1)
 
-        for stream in self._streams:
-            if stream not in self._acquisition_threads.keys():
-                self._acquisition_threads[stream] = None
+            if server_found and t_found is None:
+                t_found = time.perf_counter()
+            time.sleep(0.1)
+
+        # one persistent acquisition thread per connected stream
+        for worker in self._acquisition_workers.values():
+            worker.stop()
+        self._acquisition_workers = {
+            stream: _AcquisitionWorker(self._streams[stream])
+            for stream in self._streams}
 
         self.show_info()
         self._is_connected = True
@@ -142,6 +165,7 @@ class StreamReceiver:
         try:
             self.streams[stream_name]._inlet.close_stream()
             del self.streams[stream_name]
+            self._acquisition_workers.pop(stream_name).stop()
         except KeyError:
             logger.error(
                 f"The stream '{stream_name}' does not exist. Skipping.")
@@ -149,16 +173,12 @@ class StreamReceiver:
     def acquire(self):
         """
         Read data from the streams and fill their buffer using threading.
-        """
-        for stream in self._streams:
-            if self._acquisition_threads[stream] is not None and \
-                    self._acquisition_threads[stream].is_alive():
-                continue
 
-            thread = Thread(target=self._streams[stream].acquire, args=[])
-            thread.daemon = True
-            thread.start()
-            self._acquisition_threads[stream] = thread
+        Each stream has a persistent acquisition thread which is woken up;
+        a stream still busy with the previous acquisition is skipped.
+        """
+        for worker in self._acquisition_workers.values():
+            worker.request()
 
     def get_window(self, stream_name=None):
         """
@@ -176,6 +196,11 @@ class StreamReceiver:
              The data [samples x channels]
         timestamps : np.array
              The timestamps [samples]
+
+        Notes
+        -----
+        The returned arrays are preallocated per stream and overwritten by
+        the next call. Copy them to keep a window across calls.
         """
         if len(self.streams) == 1:
             stream_name = list(self.streams.keys())[0]
@@ -185,13 +210,12 @@ class StreamReceiver:
             raise ValueError
 
         winsize = self.streams[stream_name].buffer.winsize
-        self.is_connected
-        try:
-            self._acquisition_threads[stream_name].join()
-        except AttributeError:
+        worker = self._acquisition_workers[stream_name]
+        if not worker.started:
             logger.warning('.acquire() must be called before .get_window().')
             return (np.empty((0, len(self.streams[stream_name].ch_list))),
                     np.array([]))
+        worker.join()
 
         try:
             window = self.streams[stream_name].buffer.data[-winsize:]
@@ -204,7 +228,18 @@ class StreamReceiver:
             timestamps = self.streams[stream_name].buffer.timestamps[:]
 
         if len(timestamps) > 0:
-            return (np.array(window), np.array(timestamps))
+            # copy the buffer's views into the stream's reusable arrays
+            data_out, ts_out = self._window_out.get(stream_name, (None, None))
+            if data_out is None or data_out.dtype != window.dtype or \
+                    data_out.shape[1:] != window.shape[1:]:
+                data_out = np.empty((winsize,) + window.shape[1:],
+                                    dtype=window.dtype)
+                ts_out = np.empty(winsize, dtype=np.float64)
+                self._window_out[stream_name] = (data_out, ts_out)
+            n = len(timestamps)
+            np.copyto(data_out[:n], window)
+            np.copyto(ts_out[:n], timestamps)
+            return (data_out[:n], ts_out[:n])
         else:
             return (np.empty((0, len(self.streams[stream_name].ch_list))),
                     np.array([]))
@@ -233,17 +268,16 @@ class StreamReceiver:
                 "Please provide a stream name to get its buffer.")
             raise ValueError
 
-        self.is_connected
-        try:
-            self._acquisition_threads[stream_name].join()
-        except AttributeError:
+        worker = self._acquisition_workers[stream_name]
+        if not worker.started:
             logger.warning('.acquire() must be called before .get_window().')
             return (np.empty((0, len(self.streams[stream_name].ch_list))),
                     np.array([]))
+        worker.join()
 
         if len(self.streams[stream_name].buffer.timestamps) > 0:
-            return (np.array(self.streams[stream_name].buffer.data),
-                    np.array(self.streams[stream_name].buffer.timestamps))
+            return (self.streams[stream_name].buffer.data.copy(),
+                    self.streams[stream_name].buffer.timestamps.copy())
         else:
             return (np.empty((0, len(self.streams[stream_name].ch_list))),
                     np.array([]))
@@ -277,14 +311,9 @@ class StreamReceiver:
     @property
     def is_connected(self):
         """
-        Check the connection status and automatically connect if not connected.
+        The connection status. connect() blocks until a stream is found, so
+        this is True once the StreamReceiver is instanciated.
         """
-        while not self._is_connected:
-            logger.error('No LSL servers connected yet. '
-                         'Trying to connect automatically.')
-            self.connect()
-            time.sleep(1)
-
         return self._is_connected
 
     @is_connected.setter
@@ -301,3 +330,68 @@ class StreamReceiver:
     @streams.setter
     def streams(self, streams):
         logger.warning("The connected streams cannot be modified.")
+
+
+class _AcquisitionWorker:
+    """
+    Persistent daemon thread acquiring a stream's data on request.
+
+    Parameters
+    ----------
+    stream : _Stream
+        The stream to acquire from.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._request = Event()
+        self._idle = Event()
+        self._idle.set()
+        self._stopped = False
+        self.started = False
+
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """
+        Wait for a request, acquire, signal completion.
+
+        A failed acquisition (e.g. pylsl.LostError) is logged and the thread
+        keeps serving requests, so that join() never waits for a dead thread.
+        """
+        while True:
+            self._request.wait()
+            self._request.clear()
+            if self._stopped:
+                break
+            try:
+                self._stream.acquire()
+            except Exception:
+                logger.exception(
+                    f'Acquisition from the stream {self._stream.name} failed.')
+            finally:
+                self._idle.set()
+
+    def request(self):
+        """
+        Start an acquisition, unless the previous one is still running.
+        """
+        if not self._idle.is_set():
+            return
+        self._idle.clear()
+        self.started = True
+        self._request.set()
+
+    def join(self):
+        """
+        Wait for the current acquisition to finish.
+        """
+        self._idle.wait()
+
+    def stop(self):
+        """
+        Let the thread exit once the current acquisition is done.
+        """
+        self._stopped = True
+        self._request.set()
@@ -106,9 +106,55 @@ class _ScopeEEG(_Scope):
         Initialize buffer(s).
         """
         super().init_buffer(duration_buffer)
-        self.trigger_buffer = np.zeros(self.n_samples_buffer)
-        self.data_buffer = np.zeros((self.n_channels, self.n_samples_buffer),
-                                    dtype=np.float32)
+        # Ring buffers twice the buffer size: the last n_samples_buffer
+        # samples are always contiguous and end at self._head.
+        self._trigger_ring = np.zeros(2 * self.n_samples_buffer)
+        self._data_ring = np.zeros(
+            (self.n_channels, 2 * self.n_samples_buffer), dtype=np.float32)
+        self._head = self.n_samples_buffer
+
+    def _push_buffer(self, data, trigger):
+        """
+        Append the acquired samples to the ring buffers. The live window is
+        moved back to the start of the rings only once they are full, instead
+        of shifting the whole buffer on every acquisition.
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            The acquired data (channels, samples).
+        trigger : numpy.ndarray
+            The acquired trigger (samples, ).
+        """
+        n = min(len(trigger), self.n_samples_buffer)
+        data, trigger = data[:, -n:], trigger[-n:]
+
+        if self._trigger_ring.shape[0] < self._head + n:
+            keep = self.n_samples_buffer - n
+            start = self._head - keep
+            self._data_ring[:, :keep] = self._data_ring[:, start:self._head]
+            self._trigger_ring[:keep] = self._trigger_ring[start:self._head]
+            self._head = keep
+
+        self._data_ring[:, self._head:self._head+n] = data
+        self._trigger_ring[self._head:self._head+n] = trigger
+        self._head += n
+
+    @property
+    def data_buffer(self):
+        """
+        The last n_samples_buffer samples, shape (channels, samples).
+        """
+        return self._data_ring[
+            :, self._head-self.n_samples_buffer:self._head]
+
+    @property
+    def trigger_buffer(self):
+        """
+        The last n_samples_buffer trigger samples, shape (samples, ).
+        """
+        return self._trigger_ring[
+            self._head-self.n_samples_buffer:self._head]
 
     def init_bandpass_filter(self, low, high):
         """
@@ -139,14 +185,8 @@ class _ScopeEEG(_Scope):
         if len(self._ts_list) > 0:
             self.filter_signal()
             self.filter_trigger()
-            # shape (channels, samples)
-            self.data_buffer = np.roll(self.data_buffer, -len(self._ts_list),
-                                       axis=1)
-            self.data_buffer[:, -len(self._ts_list):] = self.data_acquired.T
-            # shape (samples, )
-            self.trigger_buffer = np.roll(
-                self.trigger_buffer, -len(self._ts_list))
-            self.trigger_buffer[-len(self._ts_list):] = self.trigger_acquired
+            # shapes (channels, samples) and (samples, )
+            self._push_buffer(self.data_acquired.T, self.trigger_acquired)
 
     def read_lsl_stream(self):
         """
@@ -9,15 +9,17 @@ Swiss Federal Institute of Technology Lausanne (EPFL)
 """
 import mne
 import numpy as np
+import scipy.signal
+from functools import lru_cache
+from joblib import Parallel, delayed, effective_n_jobs
 
 from .events import find_event_channel
 from ... import logger
 
-mne.set_log_level('ERROR')
-
 #----------------------------------------------------------------------
 def preprocess(raw, sfreq=None, spatial=None, spatial_ch=None, spectral=None, spectral_ch=None,
-               notch=None, notch_ch=None, multiplier=1, ch_names=None, rereference=None, decim=None, n_jobs=1):
+               notch=None, notch_ch=None, multiplier=1, ch_names=None, rereference=None, decim=None, n_jobs=1,
+               spectral_method='fir', notch_method='fir', decim_method='fft'):
     """
     Apply spatial, spectral, notch filters, rereference and decim.
 
@@ -56,6 +58,21 @@ def preprocess(raw, sfreq=None, spatial=None, spatial_ch=None, spectral=None, sp
         List of new and old references. [[ref_new_1, ..., ref_new_N], [ref_old_1, ..., ref_old_N]]
     decim: None | int
         Apply low-pass filter and decimate (downsample). sfreq must be given. Ignored if 1.
+    n_jobs : int
+        Number of threads for the spectral and notch filters, over the epochs for
+        epochs data, over the channels otherwise. -1: all the CPUs.
+    spectral_method : 'fir' | 'iir'
+        'fir': zero-phase FIR filter (same as mne.filter.filter_data).
+        'iir': 4th order Butterworth applied forward-backward (scipy sosfiltfilt), much cheaper
+        for long recordings. The signal must be longer than the filter's padding.
+    notch_method : 'fir' | 'iir'
+        'fir': zero-phase FIR band-stop (same as mne.filter.notch_filter).
+        'iir': cascade of 3 Hz wide second-order notches, one per frequency, applied
+        forward-backward (scipy sosfiltfilt). Much cheaper for several harmonics.
+    decim_method : 'fft' | 'poly'
+        'fft': FFT resampling (same as mne.filter.resample).
+        'poly': polyphase FIR decimation (scipy resample_poly, Kaiser window), much cheaper
+        for long recordings. Only used for numpy arrays with an integer decim.
 
     Output
     ------
@@ -64,36 +81,43 @@ def preprocess(raw, sfreq=None, spatial=None, spatial_ch=None, spectral=None, sp
     Note: To save computation time, input data may be modified in-place.
     TODO: Add an option to disable in-place modification.
     """
+    # The data kind does not change along the pipeline, check it once
+    is_array = isinstance(raw, np.ndarray)
 
     # Re-reference channels
     if rereference is not None:
-        raw = rereference(raw, rereference[0], rereference[1])
+        raw = _rereference(raw, rereference[0], rereference[1])
 
     # Downsample
     if decim is not None and decim != 1:
         assert sfreq is not None and sfreq > 0, 'Wrong sfreq value.'
-        raw, sfreq = _apply_downsampling(raw, decim, sfreq, n_jobs)
+        raw, sfreq = _apply_downsampling(raw, decim, sfreq, n_jobs, is_array, decim_method)
 
     # Format data to numpy array
-    data, eeg_channels, ch_names= _format_eeg_data_for_preprocessing(raw, ch_names)
+    data, eeg_channels, name2idx = _format_eeg_data_for_preprocessing(raw, ch_names, is_array)
 
     # Do unit conversion
     if multiplier != 1:
-        data[eeg_channels] *= multiplier
+        eeg_slice = _as_slice(eeg_channels)
+        if eeg_slice is not None:
+            data[..., eeg_slice, :] *= multiplier
+        else:
+            data[..., eeg_channels, :] *= multiplier
 
     # Apply spatial filter
     if spatial is not None:
-        _apply_spatial_filtering(data, spatial, eeg_channels, spatial_ch, ch_names)
+        _apply_spatial_filtering(data, spatial, eeg_channels, spatial_ch, name2idx)
 
     # Apply spectral filter
     if spectral is not None:
-        _apply_spectral_filtering(data, spectral_ch, eeg_channels, ch_names, n_jobs, spectral, sfreq)
+        _apply_spectral_filtering(data, spectral_ch, eeg_channels, name2idx, n_jobs, spectral, sfreq,
+                                  spectral_method)
 
     # Apply notch filter
     if notch is not None:
-        _apply_notch_filtering(data, notch, notch_ch, eeg_channels, ch_names, n_jobs, sfreq)
+        _apply_notch_filtering(data, notch, notch_ch, eeg_channels, name2idx, n_jobs, sfreq, notch_method)
 
-    if type(raw) == np.ndarray:
+    if is_array:
         raw = data
 
     return raw
@@ -115,11 +139,15 @@ def rereference(raw, ref_new, ref_old=None, **kwargs):
             # Number of channel to recover
             if isinstance(ref_old, (list, tuple, np.ndarray)):
                 ref_old = len(ref_old)
-            # Add blank (zero-valued) channel(s)
-            refs = np.zeros((ref_old, raw.shape[1]))
-            raw = np.vstack((raw, refs)) # this can not be done in-place
+            # Add blank (zero-valued) channel(s), this can not be done in-place
+            n_channels = raw.shape[0]
+            out = np.empty((n_channels + ref_old, raw.shape[1]), dtype=np.promote_types(raw.dtype, np.float64))
+            out[:n_channels] = raw
+            out[n_channels:] = 0
+            raw = out
         # Re-reference
-        raw -= np.mean(raw[ref_new], axis=0)
+        ref_mean = raw[ref_new].mean(axis=0)
+        raw -= ref_mean
 
     # For MNE raw
     else:
@@ -129,22 +157,197 @@ def rereference(raw, ref_new, ref_old=None, **kwargs):
 
         if ref_old is not None:
             # Add blank (zero-valued) channel(s)
-            mne.add_reference_channels(raw, ref_old, copy=False)
+            mne.add_reference_channels(raw, ref_old, copy=False, verbose='ERROR')
         # Re-reference
+        kwargs.setdefault('verbose', 'ERROR')
         mne.set_eeg_reference(raw, ref_new, copy=False, **kwargs)
 
     return raw
 
+# preprocess() has a rereference parameter shadowing the function
+_rereference = rereference
+
+#----------------------------------------------------------------------
+def compile_preprocess(n_channels, sfreq=None, spatial=None, spatial_ch=None, spectral=None, spectral_ch=None,
+                       notch=None, notch_ch=None, multiplier=1, ch_names=None, rereference=None, decim=None, n_jobs=1,
+                       spectral_method='fir', notch_method='fir', decim_method='fft'):
+    """
+    Compile preprocess() for numpy arrays with fixed parameters.
+
+    The channel look-ups, the spatial filter matrices and the filter coefficients
+    are computed once. The returned function only does the numeric work, which
+    saves the parameters parsing when the same preprocessing is applied to every
+    window of an online decoder.
+
+    Parameters
+    ----------
+    n_channels : int
+        The number of channels of the data to preprocess (numpy array, no event channel).
+    Other parameters: see preprocess().
+
+    Returns
+    -------
+    function : preprocess(data) taking and returning a numpy array [channels x times]
+    or [epochs x channels x times]. The input data may be modified in-place.
+    """
+    steps = []
+    name2idx = None if ch_names is None else _get_name2idx(ch_names)
+
+    # Re-reference channels
+    if rereference is not None:
+        ref_new, ref_old = rereference[0], rereference[1]
+        steps.append(lambda data: _rereference(data, ref_new, ref_old))
+        if ref_old is not None:
+            n_channels += ref_old if isinstance(ref_old, int) else len(ref_old)
+
+    # Downsample
+    if decim is not None and decim != 1:
+        assert sfreq is not None and sfreq > 0, 'Wrong sfreq value.'
+        sfreq_in = sfreq
+        steps.append(lambda data: _apply_downsampling(data, decim, sfreq_in, n_jobs, True, decim_method)[0])
+        sfreq = sfreq / decim
+
+    eeg_channels = np.arange(n_channels)
+
+    # Do unit conversion
+    if multiplier != 1:
+        steps.append(lambda data: np.multiply(data, multiplier, out=data))
+
+    # Apply spatial filter
+    if spatial == 'car':
+        car_ch = _get_car_picks(spatial_ch, eeg_channels, name2idx)
+        if len(car_ch) > 1:
+            car_slice = _as_slice(car_ch)
+            def spatial_filter(data):
+                if car_slice is not None:
+                    car = data[..., car_slice, :]
+                    _subtract_channel_mean(car)
+                else:
+                    car = data[..., car_ch, :]
+                    _subtract_channel_mean(car)
+                    data[..., car_ch, :] = car
+                return data
+            steps.append(spatial_filter)
+    elif spatial == 'laplacian':
+        lap_ch = _get_laplacian_picks(spatial_ch, name2idx)
+        if len(lap_ch) > 1:
+            srcs, L = _get_laplacian_matrix(lap_ch, n_channels)
+            def spatial_filter(data):
+                data[..., srcs, :] = np.matmul(L, data)
+                return data
+            steps.append(spatial_filter)
+    elif spatial is not None:
+        logger.error('preprocess(): Unknown spatial filter %s' % spatial)
+        raise ValueError
+
+    # Apply spectral filter
+    if spectral is not None:
+        spectral_picks = _get_filter_picks(spectral_ch, eeg_channels, name2idx, 'temporal filter')
+        spectral_func, spectral_coefs = _get_spectral_filter(spectral, sfreq, spectral_method)
+        def spectral_filter(data):
+            _apply_in_threads(spectral_func, data, n_jobs, spectral_picks, spectral_coefs)
+            return data
+        steps.append(spectral_filter)
+
+    # Apply notch filter
+    if notch is not None:
+        notch_picks = _get_filter_picks(notch_ch, eeg_channels, name2idx, 'notch filter')
+        notch_func, notch_coefs = _get_notch_filter(notch, sfreq, notch_method)
+        def notch_filter(data):
+            _apply_in_threads(notch_func, data, n_jobs, notch_picks, notch_coefs)
+            return data
+        steps.append(notch_filter)
+
+    def compiled_preprocess(data):
+        for step in steps:
+            data = step(data)
+        return data
+
+    return compiled_preprocess
+
+#----------------------------------------------------------------------
+class StreamingPreprocessor:
+    """
+    Stateful preprocessing of the successive chunks of a data stream.
+
+    The unit conversion and the spatial filter are applied as in preprocess().
+    The spectral and notch filters use the 'iir' designs of preprocess(), applied
+    causally (forward only). Their state is kept between calls, so the chunks are
+    filtered as one continuous signal, without transients at the chunk edges.
+
+    Parameters
+    ----------
+    n_channels : int
+        The number of channels of the streamed data (no event channel).
+    sfreq : float
+        The sampling frequency.
+    Other parameters: see preprocess().
+    """
+
+    def __init__(self, n_channels, sfreq, spatial=None, spatial_ch=None, spectral=None, spectral_ch=None,
+                 notch=None, notch_ch=None, multiplier=1, ch_names=None):
+        self._memoryless = compile_preprocess(n_channels, sfreq=sfreq, spatial=spatial, spatial_ch=spatial_ch,
+                                              multiplier=multiplier, ch_names=ch_names)
+
+        # (picks, sos) of each temporal filter, designed once
+        eeg_channels = np.arange(n_channels)
+        name2idx = None if ch_names is None else _get_name2idx(ch_names)
+        self._filters = []
+        if spectral is not None:
+            picks = _get_filter_picks(spectral_ch, eeg_channels, name2idx, 'temporal filter')
+            self._filters.append((picks, _design_spectral_iir(sfreq, spectral[0], spectral[1])))
+        if notch is not None:
+            picks = _get_filter_picks(notch_ch, eeg_channels, name2idx, 'notch filter')
+            freqs = tuple(np.atleast_1d(notch).tolist())
+            self._filters.append((picks, _design_notch_iir(sfreq, freqs)))
+
+        self.reset()
+
+    def reset(self):
+        """
+        Reset the filters' state, the next chunk starts a new signal.
+        """
+        self._zi = [None] * len(self._filters)
+
+    def __call__(self, data):
+        """
+        Preprocess the next chunk of data.
+
+        Parameters
+        ----------
+        data : numpy.array
+            The chunk [channels x times]. It may be modified in-place.
+
+        Returns
+        -------
+        numpy.array : The preprocessed chunk [channels x times]
+        """
+        data = self._memoryless(data)
+
+        for i, (picks, sos) in enumerate(self._filters):
+            x = data[picks, :]
+            zi = self._zi[i]
+            if zi is None:
+                # Steady state for the first sample, avoids the step response
+                zi = scipy.signal.sosfilt_zi(sos)[:, np.newaxis, :] * x[np.newaxis, :, :1]
+            data[picks, :], self._zi[i] = scipy.signal.sosfilt(sos, x, axis=-1, zi=zi)
+
+        return data
+
 #----------------------------------------------------------------------
-def _apply_downsampling(raw, decim, sfreq, n_jobs):
+def _apply_downsampling(raw, decim, sfreq, n_jobs, is_array, method='fft'):
     """
     Apply downsampling with factor decim.
     """
-    if type(raw) == np.ndarray:
-        raw = mne.filter.resample(raw, down=decim, npad='auto', window='boxcar', n_jobs=n_jobs)
+    if is_array and method == 'poly' and isinstance(decim, (int, np.integer)):
+        raw = scipy.signal.resample_poly(raw, 1, decim, axis=-1, window=('kaiser', 5.0))
+    elif is_array:
+        raw = mne.filter.resample(raw, down=decim, npad='auto', window='boxcar', n_jobs=n_jobs,
+                                  verbose='ERROR')
     else:
         # resample() of Raw* and Epochs object internally calls mne.filter.resample()
-        raw = raw.resample(raw.info['sfreq'] / decim, npad='auto', window='boxcar', n_jobs=n_jobs)
+        raw = raw.resample(raw.info['sfreq'] / decim, npad='auto', window='boxcar', n_jobs=n_jobs,
+                           verbose='ERROR')
         sfreq = raw.info['sfreq']
 
     sfreq /= decim
@@ -152,9 +355,9 @@ def _apply_downsampling(raw, decim, sfreq, n_jobs):
     return raw, sfreq
 
 #----------------------------------------------------------------------
-def _format_eeg_data_for_preprocessing(raw, ch_names=None):
+def _format_eeg_data_for_preprocessing(raw, ch_names=None, is_array=True):
     # Check datatype
-    if type(raw) == np.ndarray:
+    if is_array:
         # Numpy array: assume we don't have event channel
         data = raw
         assert 2 <= len(data.shape) <= 3, 'Unknown data shape. The dimension must be 2 or 3.'
@@ -162,7 +365,7 @@ def _format_eeg_data_for_preprocessing(raw, ch_names=None):
             n_channels = data.shape[1]
         elif len(data.shape) == 2:
             n_channels = data.shape[0]
-        eeg_channels = list(range(n_channels))
+        eeg_channels = np.arange(n_channels)
     else:
         # MNE Raw object: exclude event channel
         ch_names = raw.ch_names
@@ -173,128 +376,311 @@ def _format_eeg_data_for_preprocessing(raw, ch_names=None):
             n_channels = data.shape[1]
         elif len(data.shape) == 2:
             n_channels = data.shape[0]
-        eeg_channels = list(range(n_channels))
         tch = find_event_channel(raw)
         if tch is None:
             logger.warning('No trigger channel found. Using all channels.')
+            eeg_channels = np.arange(n_channels)
         else:
-            eeg_channels.pop(tch)
+            eeg_channels = np.delete(np.arange(n_channels), tch)
+
+    name2idx = None if ch_names is None else _get_name2idx(ch_names)
+
+    return data, eeg_channels, name2idx
+
+#----------------------------------------------------------------------
+def _as_slice(picks):
+    """
+    Return the slice equivalent to the channel indices picks if they are contiguous, else None.
+
+    Indexing with a slice gives a view, so in-place operations do not copy the picked channels.
+    """
+    if len(picks) == 0:
+        return None
+    picks = np.asarray(picks)
+    first = int(picks[0])
+    if first < 0 or not np.array_equal(picks, np.arange(first, first + len(picks))):
+        return None
+    return slice(first, first + len(picks))
 
-    return data, eeg_channels, ch_names
+#----------------------------------------------------------------------
+def _get_name2idx(ch_names):
+    """
+    Look-up table from channel names to channel indices, shared by the filters.
+    """
+    return {c: i for i, c in enumerate(ch_names)}
 
 #----------------------------------------------------------------------
-def _apply_spatial_filtering(data, spatial, eeg_channels, spatial_ch, ch_names):
+def _apply_spatial_filtering(data, spatial, eeg_channels, spatial_ch, name2idx):
     """
     Apply spatial filtering to the data. Supported: CAR or Laplacian.
     """
     if spatial == 'car':
-        _apply_car_filtering(data, spatial_ch, eeg_channels, ch_names)
+        _apply_car_filtering(data, spatial_ch, eeg_channels, name2idx)
     elif spatial == 'laplacian':
-        _apply_laplacian_filtering(data, spatial_ch, ch_names)
+        _apply_laplacian_filtering(data, spatial_ch, name2idx)
     else:
         logger.error('preprocess(): Unknown spatial filter %s' % spatial)
         raise ValueError
 
 #----------------------------------------------------------------------
-def _apply_car_filtering(data, spatial_ch, eeg_channels, ch_names):
+def _apply_car_filtering(data, spatial_ch, eeg_channels, name2idx):
     """
     Apply Common Average Reference to data.
     """
+    spatial_ch_i = _get_car_picks(spatial_ch, eeg_channels, name2idx)
+
+    if len(spatial_ch_i) > 1:
+        if len(data.shape) not in (2, 3):
+            logger.error('Unknown data shape %s' % str(data.shape))
+            raise ValueError
+
+        car_slice = _as_slice(spatial_ch_i)
+        if car_slice is not None:
+            # Contiguous channels: subtract in-place on a view
+            car = data[..., car_slice, :]
+            _subtract_channel_mean(car)
+        else:
+            # Gather the channels once, subtract in-place and scatter back
+            car = data[..., spatial_ch_i, :]
+            _subtract_channel_mean(car)
+            data[..., spatial_ch_i, :] = car
+
+    return data
+
+#----------------------------------------------------------------------
+def _subtract_channel_mean(car):
+    """
+    Subtract in-place the mean over the channels (axis -2).
+
+    One reduction into a single [1 x times] accumulator, divided and subtracted
+    in-place, without the Python-level overhead of np.mean().
+    """
+    mean = np.add.reduce(car, axis=-2, keepdims=True)
+    mean /= car.shape[-2]
+    car -= mean
+
+#----------------------------------------------------------------------
+def _get_car_picks(spatial_ch, eeg_channels, name2idx):
+    """
+    Return the indices of the CAR channels, all the EEG channels if none are specified.
+    """
     if spatial_ch is None or not len(spatial_ch):
-        spatial_ch = eeg_channels
         logger.warning('preprocess(): For CAR, no specified channels, all channels selected')
+        return eeg_channels
 
-    if type(spatial_ch[0]) == str:
-        assert ch_names is not None, 'preprocess(): ch_names must not be None'
-        spatial_ch_i = [ch_names.index(c) for c in spatial_ch]
-    else:
-        spatial_ch_i = spatial_ch
+    if isinstance(spatial_ch[0], str):
+        assert name2idx is not None, 'preprocess(): ch_names must not be None'
+        return [name2idx[c] for c in spatial_ch]
+    return spatial_ch
+
+#----------------------------------------------------------------------
+def _apply_laplacian_filtering(data, spatial_ch, name2idx):
+    """
+    Apply the lapacian spatial filtering
+    """
+    spatial_ch_i = _get_laplacian_picks(spatial_ch, name2idx)
 
     if len(spatial_ch_i) > 1:
-        if len(data.shape) == 2:
-            data[spatial_ch_i] -= np.mean(data[spatial_ch_i], axis=0)
-        elif len(data.shape) == 3:
-            means = np.mean(data[:, spatial_ch_i, :], axis=1)
-            data[:, spatial_ch_i, :] -= means[:, np.newaxis, :]
-        else:
-            logger.error('Unknown data shape %s' % str(data.shape))
+        if len(data.shape) not in (2, 3):
+            logger.error('preprocess(): Unknown data shape %s' % str(data.shape))
             raise ValueError
 
+        srcs, L = _get_laplacian_matrix(spatial_ch_i, data.shape[-2], data.dtype)
+        data[..., srcs, :] = np.matmul(L, data)
+
     return data
 
 #----------------------------------------------------------------------
-def _apply_laplacian_filtering(data, spatial_ch, ch_names):
+def _get_laplacian_picks(spatial_ch, name2idx):
     """
-    Apply the lapacian spatial filtering
+    Return the Laplacian neighbors as {CHANNEL_INDEX:[NEIGHBOR_INDICES], ...}.
     """
-    if type(spatial_ch) is not dict:
+    if not isinstance(spatial_ch, dict):
         logger.error('preprocess(): For laplacian, spatial_ch must be of form {CHANNEL:[NEIGHBORS], ...}')
         raise TypeError
-    if type(spatial_ch.keys()[0]) == str:
-        spatial_ch_i = {}
-        for c in spatial_ch:
-            ref_ch = ch_names.index(c)
-            spatial_ch_i[ref_ch] = [ch_names.index(n) for n in spatial_ch[c]]
-    else:
-        spatial_ch_i = spatial_ch
+    if spatial_ch and isinstance(next(iter(spatial_ch)), str):
+        assert name2idx is not None, 'preprocess(): ch_names must not be None'
+        return {name2idx[c]: [name2idx[n] for n in nei] for c, nei in spatial_ch.items()}
+    return spatial_ch
 
-    if len(spatial_ch_i) > 1:
-        rawcopy = data.copy()
-        for src in spatial_ch:
-            nei = spatial_ch[src]
-            if len(data.shape) == 2:
-                data[src] = rawcopy[src] - np.mean(rawcopy[nei], axis=0)
-            elif len(data.shape) == 3:
-                data[:, src, :] = rawcopy[:, src, :] - np.mean(rawcopy[:, nei, :], axis=1)
-            else:
-                logger.error('preprocess(): Unknown data shape %s' % str(data.shape))
-                raise ValueError
+#----------------------------------------------------------------------
+def _get_laplacian_matrix(spatial_ch_i, n_channels, dtype=np.float64):
+    """
+    Return the filtered channels and the Laplacian reference matrix.
 
-    return data
+    Each row is a source channel minus the mean of its neighbors. All the filtered
+    channels are computed by one matrix product (not the whole data) and written
+    back at the end, so that the neighbors' means use unfiltered values.
+    """
+    srcs = list(spatial_ch_i)
+    L = np.zeros((len(srcs), n_channels), dtype=dtype)
+    for i, (src, nei) in enumerate(spatial_ch_i.items()):
+        L[i, src] = 1
+        np.subtract.at(L[i], nei, 1 / len(nei))
+
+    return srcs, L
 
 #----------------------------------------------------------------------
-def _apply_spectral_filtering(data, spectral_ch, eeg_channels, ch_names, n_jobs, spectral, sfreq):
+def _apply_spectral_filtering(data, spectral_ch, eeg_channels, name2idx, n_jobs, spectral, sfreq,
+                              method='fir'):
     """
     Apply temporal filtering
     """
-    if spectral_ch is None:
-        spectral_ch = eeg_channels
-        logger.warning('preprocess(): For temporal filter, all channels selected')
-    elif len(spectral_ch):
-        if type(spectral_ch[0]) == str:
-            assert ch_names is not None, 'preprocess(): ch_names must not be None'
-            spectral_ch_i = [ch_names.index(c) for c in spectral_ch]
-        else:
-            spectral_ch_i = spectral_ch
-
-        # fir_design='firwin' is especially important for ICA analysis. See:
-        # http://martinos.org/mne/dev/generated/mne.preprocessing.ICA.html?highlight=score_sources#mne.preprocessing.ICA.score_sources
-        mne.filter.filter_data(data, sfreq, spectral[0], spectral[1], picks=spectral_ch_i,
-                               filter_length='auto', l_trans_bandwidth='auto',
-                               h_trans_bandwidth='auto', n_jobs=n_jobs, method='fir',
-                               iir_params=None, copy=False, phase='zero',
-                               fir_window='hamming', fir_design='firwin', verbose='ERROR')
-    else:
-        logger.error('preprocess(): For temporal filter, no specified channels!')
-        raise ValueError
+    spectral_ch_i = _get_filter_picks(spectral_ch, eeg_channels, name2idx, 'temporal filter')
+    func, coefs = _get_spectral_filter(spectral, sfreq, method)
+    _apply_in_threads(func, data, n_jobs, spectral_ch_i, coefs)
 
 #----------------------------------------------------------------------
-def _apply_notch_filtering(data, notch, notch_ch, eeg_channels, ch_names, n_jobs, sfreq):
+def _apply_notch_filtering(data, notch, notch_ch, eeg_channels, name2idx, n_jobs, sfreq, method='fir'):
     """
     Apply a notch filter to the data.
     """
-    if notch_ch is None:
-        notch_ch = eeg_channels
-        logger.warning('preprocess(): For notch filter, all channels selected')
-    elif len(notch_ch):
-        if type(notch_ch[0]) == str:
-            assert ch_names is not None, 'preprocess(): ch_names must not be None'
-            notch_ch_i = [ch_names.index(c) for c in notch_ch]
-        else:
-            notch_ch_i = notch_ch
+    notch_ch_i = _get_filter_picks(notch_ch, eeg_channels, name2idx, 'notch filter')
+    func, coefs = _get_notch_filter(notch, sfreq, method)
+    _apply_in_threads(func, data, n_jobs, notch_ch_i, coefs)
 
-        mne.filter.notch_filter(data, Fs=sfreq, freqs=notch, notch_widths=3,
-                                picks=notch_ch_i, method='fft', n_jobs=n_jobs, copy=False)
-    else:
-        logger.error('preprocess(): For temporal filter, no specified channels!')
+#----------------------------------------------------------------------
+def _get_filter_picks(picks, eeg_channels, name2idx, filter_name):
+    """
+    Return the indices of the channels to filter, all the EEG channels if picks is None.
+    """
+    if picks is None:
+        logger.warning('preprocess(): For %s, all channels selected' % filter_name)
+        return eeg_channels
+    if not len(picks):
+        logger.error('preprocess(): For %s, no specified channels!' % filter_name)
         raise ValueError
+    if isinstance(picks[0], str):
+        assert name2idx is not None, 'preprocess(): ch_names must not be None'
+        return [name2idx[c] for c in picks]
+    return picks
+
+#----------------------------------------------------------------------
+def _get_spectral_filter(spectral, sfreq, method='fir'):
+    """
+    Return the function applying the temporal filter in-place and its coefficients.
+    """
+    if method == 'fir':
+        return _apply_fir, _design_spectral_fir(sfreq, spectral[0], spectral[1])
+    elif method == 'iir':
+        return _apply_sos, _design_spectral_iir(sfreq, spectral[0], spectral[1])
+    logger.error('preprocess(): Unknown spectral filter method %s' % method)
+    raise ValueError
+
+#----------------------------------------------------------------------
+def _get_notch_filter(notch, sfreq, method='fir'):
+    """
+    Return the function applying the notch filter in-place and its coefficients.
+    """
+    freqs = tuple(np.atleast_1d(notch).tolist())
+    if method == 'fir':
+        return _apply_fir, _design_notch_fir(sfreq, freqs)
+    elif method == 'iir':
+        return _apply_sos, _design_notch_iir(sfreq, freqs)
+    logger.error('preprocess(): Unknown notch filter method %s' % method)
+    raise ValueError
+
+#----------------------------------------------------------------------
+@lru_cache(maxsize=32)
+def _design_spectral_fir(sfreq, l_freq, h_freq):
+    """
+    Design the zero-phase FIR filter of mne.filter.filter_data() once per set of parameters.
+    """
+    # fir_design='firwin' is especially important for ICA analysis. See:
+    # http://martinos.org/mne/dev/generated/mne.preprocessing.ICA.html?highlight=score_sources#mne.preprocessing.ICA.score_sources
+    return mne.filter.create_filter(None, sfreq, l_freq, h_freq, filter_length='auto',
+                                    l_trans_bandwidth='auto', h_trans_bandwidth='auto',
+                                    method='fir', phase='zero', fir_window='hamming',
+                                    fir_design='firwin', verbose='ERROR')
+
+#----------------------------------------------------------------------
+@lru_cache(maxsize=32)
+def _design_spectral_iir(sfreq, l_freq, h_freq, order=4):
+    """
+    Design the Butterworth (second-order sections) equivalent of the spectral filter once per set of parameters.
+    """
+    if l_freq is None:
+        freqs, btype = h_freq, 'lowpass'
+    elif h_freq is None:
+        freqs, btype = l_freq, 'highpass'
+    elif l_freq < h_freq:
+        freqs, btype = [l_freq, h_freq], 'bandpass'
+    else:
+        freqs, btype = [h_freq, l_freq], 'bandstop'
+
+    return scipy.signal.butter(order, freqs, btype=btype, fs=sfreq, output='sos')
+
+#----------------------------------------------------------------------
+@lru_cache(maxsize=32)
+def _design_notch_fir(sfreq, freqs, notch_width=3, trans_bandwidth=1):
+    """
+    Design the zero-phase FIR band-stop filter of mne.filter.notch_filter() once per set of parameters.
+    """
+    freqs = np.array(freqs)
+    tb_2 = trans_bandwidth / 2.0
+    lows = freqs - notch_width / 2.0 - tb_2
+    highs = freqs + notch_width / 2.0 + tb_2
+
+    return mne.filter.create_filter(None, sfreq, highs, lows, filter_length='auto',
+                                    l_trans_bandwidth=tb_2, h_trans_bandwidth=tb_2,
+                                    method='fir', phase='zero', fir_window='hamming',
+                                    fir_design='firwin', verbose='ERROR')
+
+#----------------------------------------------------------------------
+@lru_cache(maxsize=32)
+def _design_notch_iir(sfreq, freqs, notch_width=3):
+    """
+    Design a cascade of second-order notch filters (one section per frequency) once per set of parameters.
+    """
+    return np.vstack([scipy.signal.tf2sos(*scipy.signal.iirnotch(f, f / notch_width, fs=sfreq))
+                      for f in freqs])
+
+#----------------------------------------------------------------------
+def _apply_fir(data, picks, h):
+    """
+    Apply the zero-phase FIR filter h in-place on the picked channels (axis -2).
+
+    Same result as MNE: the edges are extended by odd reflection (limited to
+    the signal length) before the overlap-add convolution.
+    """
+    x = data[..., picks, :]
+    n_times = x.shape[-1]
+    n_edge = max(min(len(h), n_times) - 1, 0)
+    x = np.concatenate([2 * x[..., :1] - x[..., n_edge:0:-1],
+                        x,
+                        2 * x[..., -1:] - x[..., -2:-n_edge - 2:-1]], axis=-1)
+
+    x = scipy.signal.oaconvolve(x, h.reshape((1,) * (x.ndim - 1) + (-1,)), mode='full', axes=-1)
+    start = n_edge + (len(h) - 1) // 2
+    data[..., picks, :] = x[..., start:start + n_times]
+
+#----------------------------------------------------------------------
+def _apply_sos(data, picks, sos):
+    """
+    Apply the IIR filter sos forward-backward in-place on the picked channels (axis -2).
+    """
+    data[..., picks, :] = scipy.signal.sosfiltfilt(sos, data[..., picks, :], axis=-1)
+
+#----------------------------------------------------------------------
+def _apply_in_threads(func, data, n_jobs, picks, coefs):
+    """
+    Call func(data, picks, coefs), which filters the picked channels in-place.
+
+    The work is split in n_jobs threads: the filters release the GIL and the
+    data are not copied to other processes. Epochs data (3D) are split into
+    blocks of epochs (views), continuous data (2D) into blocks of picked channels.
+    """
+    is_epochs = len(data.shape) == 3
+    n_items = len(data) if is_epochs else len(picks)
+    n_jobs = effective_n_jobs(n_jobs)
+    if n_jobs == 1 or n_items <= 1:
+        func(data, picks, coefs)
+        return
+
+    bounds = np.linspace(0, n_items, min(n_jobs, n_items) + 1).astype(int)
+    if is_epochs:
+        jobs = (delayed(func)(data[start:stop], picks, coefs) for start, stop in zip(bounds[:-1], bounds[1:]))
+    else:
+        picks = np.asarray(picks)
+        jobs = (delayed(func)(data, picks[start:stop], coefs) for start, stop in zip(bounds[:-1], bounds[1:]))
+    Parallel(n_jobs=n_jobs, prefer='threads')(jobs)
@@ -6,6 +6,9 @@ class Timer:
     Timer class.
 
     if autoreset=True, timer is reset after any member function call
+
+    It is based on the monotonic time.perf_counter_ns(), unaffected by system
+    clock updates.
     """
 
     def __init__(self, autoreset=False):
@@ -16,9 +19,10 @@ class Timer:
         """
         Provide the time since reset in seconds.
         """
-        read = time.time() - self.ref
+        now = time.perf_counter_ns()
+        read = (now - self.ref) * 1e-9
         if self.autoreset:
-            self.reset()
+            self.ref = now
         return read
 
     def msec(self):
@@ -35,7 +39,7 @@ class Timer:
         """
         Reset the timer to zero.
         """
-        self.ref = time.time()
+        self.ref = time.perf_counter_ns()
 
     def sleep_atleast(self, sec):
         """
@@ -48,9 +52,18 @@ class Timer:
         sec : float
             The time to sleep in seconds.
         """
-        timer_sec = self.sec()
+        now = time.perf_counter_ns()
+        deadline = self.ref + int(sec * 1e9)
 
-        if timer_sec < sec:
-            time.sleep(sec - timer_sec)
+        if now < deadline:
+            # time.sleep() may overshoot by ~1 ms: sleep until 1 ms before the
+            # deadline, then busy-wait the rest for sub-millisecond accuracy.
+            remaining_ns = deadline - now
+            if remaining_ns > 2000000:
+                time.sleep((remaining_ns - 1000000) * 1e-9)
+            while time.perf_counter_ns() < deadline:
+                pass
             if self.autoreset:
                 self.reset()
+        elif self.autoreset:
+            self.ref = now
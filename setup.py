@@ -14,7 +14,7 @@ setup(
         'h5py>=2.7',
         'opencv_python>=3.4',
         'numpy>=1.16',
-        'scipy>=1.2',
+        'scipy>=1.4',
         'xgboost>=0.81',
         'matplotlib>=3.0.2',
         'mne>=0.16',
@@ -29,6 +29,7 @@ setup(
         'pyserial>=3.4',
         'simplejson>=3.16.0',
         'scikit_learn>=0.21',
+        'joblib>=0.12',
         'future',
         'configparser'
     ]